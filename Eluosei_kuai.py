@@ -1,31 +1,123 @@
 
+import math
+import time
 import pygame
-import operator
+from collections import OrderedDict
 from fangkuai import *
-from random import *
+from yinqing import GameState, TICK_RATE
+from shizhong import FixedTimestep, FrameStats
+from jiqiren import AutoPlayer
+from paihangbang import ScoreWriter
+from wangluo import ScoreClient
 from pygame.locals import *
 
 # 定义游戏相关参数
 block_size = 17  # 单个方块的高度和宽度
 width = 10       # 游戏板宽度（以方块为单位）
 height = 20      # 游戏板高度（以方块为单位）
-framerate = 30   # 帧率控制参数，数值越大速度越慢
+display_fps = 60       # 每秒最多渲染的帧数
+blink_interval = 0.3   # 提示文字闪烁的间隔（秒）
+cpu_report_interval = 0  # 每隔多少秒在控制台输出每帧 CPU 时间，0 表示不输出
+bot_interval = 0.15     # 自动游戏时放置两个方块之间的最短间隔（秒）
+server_address = None   # 在线排行榜服务器的 (地址, 端口)，None 表示只用本地排行榜；本地测试可设为 ('127.0.0.1', 7650)
 
 # 初始化 Pygame 库
 pygame.init()
 
-# 创建一个 Clock 对象用于控制帧率
-clock = pygame.time.Clock()
-
 # 设置窗口大小为 300x374 像素
 screen = pygame.display.set_mode((300, 374))
 
-# 设置定时器事件，频率为 framerate * 10 毫秒
-pygame.time.set_timer(pygame.USEREVENT, framerate * 10)
-
 # 设置窗口标题为 "PYTRIS™"
 pygame.display.set_caption("PYTRIS™")
 
+# 文字表面缓存
+class surface_cache:
+    """
+    有上限的 LRU 文字表面缓存，按 (字体, 文本, 颜色) 保存 Font.render 的结果。
+    同样的文字只光栅化一次；超出上限时丢弃最久未使用的表面。
+    数字则由单个数字的字形逐个拼出，分数变化时不必重新渲染整串文字。
+    """
+
+    def __init__(self, limit=128):
+        """
+        参数:
+        limit (int): 最多缓存的表面数量。
+        """
+        self.limit = limit
+        self.surfaces = OrderedDict()
+        self.hits = 0    # 命中次数
+        self.misses = 0  # 未命中（实际调用 Font.render）的次数
+
+    def render(self, font, text, color):
+        """
+        返回渲染好的文字表面，等价于 font.render(text, 1, color)。
+
+        参数:
+        font (pygame.font.Font): 字体对象。
+        text (str): 文本内容。
+        color (tuple): 文字颜色。
+
+        返回:
+        pygame.Surface: 文字表面（调用方不应修改它）。
+        """
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)  # 标记为最近使用
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, 1, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.limit:
+            self.surfaces.popitem(last=False)  # 丢弃最久未使用的表面
+        return surface
+
+    def blit_number(self, surface, font, value, color, pos):
+        """
+        用单个数字的字形把整数绘制到 surface 上。
+
+        参数:
+        surface (pygame.Surface): 目标表面。
+        font (pygame.font.Font): 字体对象。
+        value (int): 要绘制的整数。
+        color (tuple): 文字颜色。
+        pos (tuple): 左上角坐标。
+
+        返回:
+        pygame.Rect: 数字占用的区域。
+        """
+        x, y = pos
+        for digit in str(value):
+            glyph = self.render(font, digit, color)
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return Rect(pos[0], y, x - pos[0], font.get_height())
+
+
+# 预先绘制方块贴图
+def build_block_atlas(colors, border):
+    """
+    为每种颜色预先画好一个带 1 像素边框的方块表面，并转换为显示器的像素格式，
+    绘制游戏板时直接整块复制，不必每格调用两次 pygame.draw.rect。
+
+    参数:
+    colors (list): 方块颜色列表，索引与游戏板中的数字对应。
+    border (tuple): 边框颜色。
+
+    返回:
+    list: 与 colors 一一对应的方块表面。
+    """
+    blocks = []
+    for color in colors:
+        block = pygame.Surface((block_size, block_size)).convert()
+        block.fill(color)  # 填充颜色绘制方块
+        pygame.draw.rect(block, border, block.get_rect(), 1)  # 绘制深灰色边框
+        blocks.append(block)
+    return blocks
+
+
 # 定义 UI 相关变量和资源的类
 class ui_variables:
     # 字体路径定义
@@ -74,331 +166,252 @@ class ui_variables:
     # 颜色列表，索引对应不同的方块类型或状态
     t_color = [grey_2, cyan, blue, orange, yellow, green, pink, red, grey_3]
 
+    # 与 t_color 对应的预绘制方块贴图
+    blocks = build_block_atlas(t_color, grey_1)
 
-# 绘制单个方块
-def draw_block(x, y, color):
-    """
-    在指定坐标绘制一个带有边框的方块。
+    # 渲染好的文字表面缓存
+    texts = surface_cache(limit=128)
 
-    参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    color (tuple): 用RGB元组表示的颜色值。
-    """
-    # 填充颜色绘制方块
-    pygame.draw.rect(
-        screen,
-        color,
-        Rect(x, y, block_size, block_size)
-    )
-    # 绘制深灰色边框
-    pygame.draw.rect(
-        screen,
-        ui_variables.grey_1,
-        Rect(x, y, block_size, block_size),
-        1  # 边框宽度为1像素
-    )
 
-# 绘制游戏主界面
-def draw_board(next, hold, score, level, goal):
+# 只重绘变化部分的游戏画面渲染器
+class board_renderer:
     """
-    绘制整个游戏界面，包括侧边栏、下一个方块、持有方块、分数、等级和游戏板。
+    记住上一帧画到屏幕上的格子和侧边栏内容，每帧只重绘发生变化的格子
+    和侧边栏分区，并把这些区域收集起来交给 pygame.display.update(rects)。
 
-    参数:
-    next (int): 下一个方块类型。
-    hold (int): 当前持有的方块类型。
-    score (int): 当前得分。
-    level (int): 当前关卡。
-    goal (int): 升级所需的目标分数。
+    暂停、游戏结束和开始界面会在游戏板上叠加文字并整屏刷新，
+    之后屏幕内容不再与记录一致，需要调用 invalidate() 让下一帧整屏重绘。
     """
-    # 填充背景色（深灰色）
-    screen.fill(ui_variables.grey_1)
-
-    # 绘制右侧侧边栏
-    pygame.draw.rect(
-        screen,
-        ui_variables.white,
-        Rect(204, 0, 96, 374)  # 白色区域，用于放置UI元素
-    )
-
-    # 绘制下一个方块预览
-    grid_n = tetrimino.mino_map[next - 1][0]  # 获取下一个方块的形状数据
-
-    for i in range(4):
-        for j in range(4):
-            dx = 220 + block_size * j
-            dy = 140 + block_size * i
-            if grid_n[i][j] != 0:  # 如果该位置有方块
+
+    # 侧边栏分区：每个分区包含一个标题和对应的内容，变化时整块重绘
+    hold_area = Rect(204, 0, 96, 90)      # HOLD 标题和持有方块
+    next_area = Rect(204, 90, 96, 100)    # NEXT 标题和下一个方块
+    score_area = Rect(204, 190, 96, 60)   # SCORE 标题和分数
+    level_area = Rect(204, 250, 96, 60)   # LEVEL 标题和等级
+    goal_area = Rect(204, 310, 96, 64)    # GOAL 标题和目标
+
+    # 游戏板在屏幕上的区域，下落中的方块贴图会被裁剪到这里
+    board_area = Rect(17, 17, block_size * width, block_size * height)
+
+    def __init__(self):
+        self.cells = None    # 上一帧每个可见格子的颜色编号，None 表示需要整屏重绘
+        self.sidebar = None  # 上一帧侧边栏显示的 (next, hold, score, level, goal)
+        self.piece = None    # 上一帧绘制的当前方块 (x, y, mino, r, offset)
+        self.cover = ()      # 上一帧当前方块贴图盖住的格子
+        self.rects = []      # 本帧改动过的屏幕区域
+
+    def invalidate(self):
+        """让下一帧整屏重绘。"""
+        self.cells = None
+        self.sidebar = None
+        self.piece = None
+        self.cover = ()
+
+    def draw(self, frame, next, hold, score, level, goal, piece=None):
+        """
+        把一帧画面画到屏幕上，只重绘与上一帧不同的部分。
+
+        参数:
+        frame (list): 按 y * width + x 排列的可见格子颜色编号。
+        next (int): 下一个方块类型。
+        hold (int): 当前持有的方块类型。
+        score (int): 当前得分。
+        level (int): 当前关卡。
+        goal (int): 升级所需的目标分数。
+        piece (tuple): 叠加绘制的当前方块 (x, y, mino, r, offset)，
+                       offset 为 0-1 之间的下落插值；None 表示不绘制。
+        """
+        cells = self.cells
+        sidebar = (next, hold, score, level, goal)
+        old = self.sidebar
+
+        if cells is None:
+            # 填充背景色（深灰色）
+            screen.fill(ui_variables.grey_1)
+            self.rects = [screen.get_rect()]
+
+        # 侧边栏：只重绘内容变化的分区
+        if old is None or old[1] != hold:
+            self.draw_preview(self.hold_area, "HOLD", hold, 50)
+        if old is None or old[0] != next:
+            self.draw_preview(self.next_area, "NEXT", next, 140)
+        if old is None or old[2] != score:
+            self.draw_value(self.score_area, "SCORE", min(score, 999999))  # 防止分数过大导致显示问题
+        if old is None or old[3] != level:
+            self.draw_value(self.level_area, "LEVEL", level)
+        if old is None or old[4] != goal:
+            self.draw_value(self.goal_area, "GOAL", goal)
+
+        # 游戏板：只重绘颜色发生变化的格子
+        if cells is None:
+            dirty = set(range(len(frame)))
+        else:
+            dirty = {index for index, value in enumerate(frame) if cells[index] != value}
+
+        # 当前方块变化，或它下面的格子被重绘时，需要擦掉旧贴图并重画方块
+        redraw_piece = piece != self.piece or not dirty.isdisjoint(self.cover)
+        if redraw_piece:
+            dirty.update(self.cover)
+
+        # 用一次 blits 批量复制方块贴图
+        blocks = ui_variables.blocks
+        batch = [
+            (blocks[frame[index]], (17 + block_size * (index % width), 17 + block_size * (index // width)))
+            for index in dirty
+        ]
+        if batch:
+            screen.blits(batch, doreturn=0)
+            if cells is not None:
+                self.rects.extend(Rect(pos, (block_size, block_size)) for block, pos in batch)
+
+        if redraw_piece:
+            self.cover = self.draw_mino(piece) if piece is not None else ()
+
+        self.cells = frame
+        self.sidebar = sidebar
+        self.piece = piece
+
+    def draw_mino(self, piece):
+        """
+        按插值后的位置绘制下落中的方块贴图，返回贴图盖住的格子。
+        第 0 行是隐藏的出生行，超出游戏板的部分会被裁剪掉。
+        """
+        x, y, mino, r, offset = piece
+        block = ui_variables.blocks[mino]
+        sprites = []
+        cover = []
+        for j, i in tetrimino.shapes[mino - 1][r].cells:
+            row = y + i - 1 + offset  # 可见区域中的行（可以是小数）
+            pos = (17 + block_size * (x + j), 17 + int(round(block_size * row)))
+            sprites.append((block, pos))
+            self.rects.append(Rect(pos, (block_size, block_size)).clip(self.board_area))
+            for covered in {math.floor(row), math.ceil(row)}:
+                if 0 <= covered < height:
+                    cover.append(covered * width + x + j)
+
+        screen.set_clip(self.board_area)
+        screen.blits(sprites, doreturn=0)
+        screen.set_clip(None)
+        return cover
+
+    def draw_preview(self, area, label, mino, top):
+        """重绘持有方块或下一个方块的预览分区。"""
+        pygame.draw.rect(screen, ui_variables.white, area)
+        screen.blit(ui_variables.texts.render(ui_variables.h5, label, ui_variables.black), (215, area.top + 14))
+        if mino != -1:
+            for j, i in tetrimino.shapes[mino - 1][0].cells:  # 只遍历被占用的 4 个格子
                 pygame.draw.rect(
                     screen,
-                    ui_variables.t_color[grid_n[i][j]],  # 根据数字绘制对应颜色
-                    Rect(dx, dy, block_size, block_size)
+                    ui_variables.t_color[mino],  # 根据方块类型绘制对应颜色
+                    Rect(220 + block_size * j, top + block_size * i, block_size, block_size)
                 )
+        self.rects.append(area)
+
+    def draw_value(self, area, label, value):
+        """重绘分数、等级或目标分区。"""
+        pygame.draw.rect(screen, ui_variables.white, area)
+        screen.blit(ui_variables.texts.render(ui_variables.h5, label, ui_variables.black), (215, area.top + 4))
+        ui_variables.texts.blit_number(screen, ui_variables.h4, value, ui_variables.black, (220, area.top + 20))
+        self.rects.append(area)
+
+    def flush(self, full=False):
+        """
+        把本帧改动过的区域刷新到窗口上。
+
+        参数:
+        full (bool): 为 True 时整屏刷新，用于叠加了文字的暂停、结束界面，
+                     之后的第一帧会整屏重绘。
+        """
+        if full:
+            pygame.display.update()
+            self.invalidate()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
 
-    # 绘制持有方块
-    grid_h = tetrimino.mino_map[hold - 1][0]  # 获取当前持有方块的形状数据
-
-    if hold_mino != -1:  # 如果已经持有一个方块
-        for i in range(4):
-            for j in range(4):
-                dx = 220 + block_size * j
-                dy = 50 + block_size * i
-                if grid_h[i][j] != 0:  # 如果该位置有方块
-                    pygame.draw.rect(
-                        screen,
-                        ui_variables.t_color[grid_h[i][j]],  # 绘制对应颜色
-                        Rect(dx, dy, block_size, block_size)
-                    )
-
-    # 设置最大分数限制
-    if score > 999999:
-        score = 999999  # 防止分数过大导致显示问题
-
-    # 渲染文本内容
-    text_hold = ui_variables.h5.render("HOLD", 1, ui_variables.black)  # "HOLD" 文本
-    text_next = ui_variables.h5.render("NEXT", 1, ui_variables.black)  # "NEXT" 文本
-    text_score = ui_variables.h5.render("SCORE", 1, ui_variables.black)  # "SCORE" 文本
-    score_value = ui_variables.h4.render(str(score), 1, ui_variables.black)  # 当前分数
-    text_level = ui_variables.h5.render("LEVEL", 1, ui_variables.black)  # "LEVEL" 文本
-    level_value = ui_variables.h4.render(str(level), 1, ui_variables.black)  # 当前等级
-    text_goal = ui_variables.h5.render("GOAL", 1, ui_variables.black)  # "GOAL" 文本
-    goal_value = ui_variables.h4.render(str(goal), 1, ui_variables.black)  # 目标分数
-
-    # 将文本绘制到屏幕上
-    screen.blit(text_hold, (215, 14))       # HOLD 文本位置
-    screen.blit(text_next, (215, 104))      # NEXT 文本位置
-    screen.blit(text_score, (215, 194))     # SCORE 文本位置
-    screen.blit(score_value, (220, 210))    # 分数数值位置
-    screen.blit(text_level, (215, 254))     # LEVEL 文本位置
-    screen.blit(level_value, (220, 270))    # 等级数值位置
-    screen.blit(text_goal, (215, 314))      # GOAL 文本位置
-    screen.blit(goal_value, (220, 330))     # 目标数值位置
-
-    # 绘制游戏板上的所有方块
-    for x in range(width):          # 遍历游戏板的列
-        for y in range(height):     # 遍历游戏板的行
-            dx = 17 + block_size * x
-            dy = 17 + block_size * y
-            draw_block(dx, dy, ui_variables.t_color[matrix[x][y + 1]])  # 调用draw_block绘制每个方块
-
-# 绘制一个 Tetrimino（俄罗斯方块中的方块）
-def draw_mino(x, y, mino, r):
-    """
-    在指定位置绘制一个 Tetrimino，并在底部绘制“幽灵方块”作为投影。
-
-    参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 旋转状态（0-3）。
-    """
-    grid = tetrimino.mino_map[mino - 1][r]  # 获取当前方块在该旋转状态下的形状矩阵
-
-    tx, ty = x, y
-    # 找到方块可以下落到的最底部位置
-    while not is_bottom(tx, ty, mino, r):
-        ty += 1
-
-    # 绘制“幽灵”投影
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                matrix[tx + j][ty + i] = 8  # 使用数字8表示幽灵方块
 
-    # 绘制实际的方块
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                matrix[x + j][y + i] = grid[i][j]  # 将方块写入游戏板矩阵
+renderer = board_renderer()
 
 
-# 擦除一个 Tetrimino
-def erase_mino(x, y, mino, r):
+# 绘制游戏主界面
+def draw_board(next, hold, score, level, goal, show_mino=False, fall=0.0):
     """
-    从游戏板矩阵中擦除指定的 Tetrimino。
+    绘制整个游戏界面，包括侧边栏、下一个方块、持有方块、分数、等级和游戏板。
+    实际只重绘与上一帧不同的部分，见 board_renderer。
 
     参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 旋转状态（0-3）。
+    next (int): 下一个方块类型。
+    hold (int): 当前持有的方块类型。
+    score (int): 当前得分。
+    level (int): 当前关卡。
+    goal (int): 升级所需的目标分数。
+    show_mino (bool): 是否叠加绘制当前方块和投影。
+    fall (float): 当前方块下落到下一行的进度（0-1），用于平滑显示下落。
     """
-    grid = tetrimino.mino_map[mino - 1][r]  # 获取当前方块在该旋转状态下的形状矩阵
-
-    # 擦除“幽灵”投影
-    for j in range(21):
-        for i in range(10):
-            if matrix[i][j] == 8:
-                matrix[i][j] = 0  # 清除幽灵方块
-
-    # 擦除实际的方块
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                matrix[x + j][y + i] = 0  # 清除方块
-
-
-# 判断方块是否已到达底部
-def is_bottom(x, y, mino, r):
+    matrix = game.matrix
+    # 第 0 行是隐藏的出生行，不绘制
+    frame = [matrix[x][y] for y in range(1, height + 1) for x in range(width)]
+    piece = None
+    if show_mino:
+        draw_ghost(frame, game.dx, game.ghost_y(), game.mino, game.rotation)
+        piece = (game.dx, game.dy, game.mino, game.rotation, fall)
+    renderer.draw(frame, next, hold, score, level, goal, piece)
+
+# 绘制“幽灵方块”投影
+def draw_ghost(frame, x, y, mino, r):
     """
-    判断当前方块是否已经到达底部或下方有其他方块。
+    把方块落点处的“幽灵方块”投影写入待绘制的画面。
+    只修改画面缓冲，不写入游戏板矩阵。
 
     参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
+    frame (list): 按 y * width + x 排列的可见格子颜色编号。
+    x (int): 投影左上角的x坐标。
+    y (int): 投影左上角的y坐标（GameState.ghost_y() 的缓存结果）。
     mino (int): 方块类型（1-7）。
     r (int): 旋转状态（0-3）。
-
-    返回:
-    bool: 如果无法继续下落则返回 True，否则返回 False。
     """
-    grid = tetrimino.mino_map[mino - 1][r]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                if (y + i + 1) > 20:  # 超出游戏板底部边界
-                    return True
-                elif matrix[x + j][y + i + 1] != 0 and matrix[x + j][y + i + 1] != 8:
-                    # 下方已经有其他方块
-                    return True
+    for j, i in tetrimino.shapes[mino - 1][r].cells:  # 当前旋转状态下被占用的 4 个格子
+        if y + i >= 1:  # 第 0 行是隐藏的出生行，不绘制
+            frame[(y + i - 1) * width + x + j] = 8  # 使用数字8表示幽灵方块
 
-    return False
 
-
-# 判断方块是否已到达左侧边缘
-def is_leftedge(x, y, mino, r):
+# 播放消行音效
+def play_erase_sound(erase_count):
     """
-    判断当前方块是否已经到达左侧边缘或左侧有其他方块。
+    根据一次消除的行数播放对应音效。
 
     参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 旋转状态（0-3）。
-
-    返回:
-    bool: 如果无法继续左移则返回 True，否则返回 False。
+    erase_count (int): 消除的行数（0-4）。
     """
-    grid = tetrimino.mino_map[mino - 1][r]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                if (x + j - 1) < 0:  # 超出游戏板左侧边界
-                    return True
-                elif matrix[x + j - 1][y + i] != 0:  # 左侧已经有其他方块
-                    return True
-
-    return False
-
-
-# 判断方块是否已到达右侧边缘
-def is_rightedge(x, y, mino, r):
+    if erase_count == 1:
+        ui_variables.single_sound.play()
+    elif erase_count == 2:
+        ui_variables.double_sound.play()
+    elif erase_count == 3:
+        ui_variables.triple_sound.play()
+    elif erase_count == 4:
+        ui_variables.tetris_sound.play()
+
+
+# 等待输入或下一个截止时间
+def wait_events(deadline):
     """
-    判断当前方块是否已经到达右侧边缘或右侧有其他方块。
+    阻塞等待事件，直到收到事件或到达 deadline，期间不占用 CPU。
+    截止时间已过时不阻塞，只取出已有的事件。
 
     参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 旋转状态（0-3）。
+    deadline (float): 截止时间（time.perf_counter() 的秒数）。
 
     返回:
-    bool: 如果无法继续右移则返回 True，否则返回 False。
-    """
-    grid = tetrimino.mino_map[mino - 1][r]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                if (x + j + 1) > 9:  # 超出游戏板右侧边界
-                    return True
-                elif matrix[x + j + 1][y + i] != 0:  # 右侧已经有其他方块
-                    return True
-
-    return False
-
-
-# 判断是否可以向右旋转
-def is_turnable_r(x, y, mino, r):
+    list: 收到的事件，超时则为空列表。
     """
-    判断当前方块是否可以在当前位置向右旋转。
-
-    参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 当前旋转状态（0-3）。
-
-    返回:
-    bool: 如果可以旋转则返回 True，否则返回 False。
-    """
-    if r != 3:
-        grid = tetrimino.mino_map[mino - 1][r + 1]
-    else:
-        grid = tetrimino.mino_map[mino - 1][0]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                if (x + j) < 0 or (x + j) > 9 or (y + i) < 0 or (y + i) > 20:
-                    return False  # 超出边界
-                elif matrix[x + j][y + i] != 0:
-                    return False  # 已经有其他方块
-
-    return True
-
-
-# 判断是否可以向左旋转
-def is_turnable_l(x, y, mino, r):
-    """
-    判断当前方块是否可以在当前位置向左旋转。
-
-    参数:
-    x (int): 方块左上角的x坐标。
-    y (int): 方块左上角的y坐标。
-    mino (int): 方块类型（1-7）。
-    r (int): 当前旋转状态（0-3）。
-
-    返回:
-    bool: 如果可以旋转则返回 True，否则返回 False。
-    """
-    if r != 0:
-        grid = tetrimino.mino_map[mino - 1][r - 1]
-    else:
-        grid = tetrimino.mino_map[mino - 1][3]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0:
-                if (x + j) < 0 or (x + j) > 9 or (y + i) < 0 or (y + i) > 20:
-                    return False  # 超出边界
-                elif matrix[x + j][y + i] != 0:
-                    return False  # 已经有其他方块
-
-    return True
-
-
-# 判断新方块是否可以放置
-def is_stackable(mino):
-    """
-    判断新生成的方块是否可以在初始位置放置。
-
-    参数:
-    mino (int): 方块类型（1-7）。
-
-    返回:
-    bool: 如果可以放置则返回 True，否则返回 False。
-    """
-    grid = tetrimino.mino_map[mino - 1][0]
-
-    for i in range(4):
-        for j in range(4):
-            if grid[i][j] != 0 and matrix[3 + j][i] != 0:
-                return False  # 初始位置已有其他方块
-
-    return True
+    timeout = int((deadline - time.perf_counter()) * 1000)
+    if timeout > 0:
+        event = pygame.event.wait(timeout)
+        if event.type == NOEVENT:
+            return []  # 超时
+        return [event] + pygame.event.get()
+    return pygame.event.get()
 
 
 # 初始化游戏变量
@@ -408,383 +421,178 @@ pause = False         # 游戏是否处于暂停状态
 done = False          # 游戏是否已经结束（窗口关闭）
 game_over = False     # 是否游戏失败（方块堆到顶部）
 
-score = 0             # 当前得分
-level = 1             # 当前关卡等级
-goal = level * 5      # 升级所需消除的行数目标
-bottom_count = 0      # 计时器，用于控制方块自动下落
-hard_drop = False     # 是否进行了硬降（即快速下落到底部）
-
-dx, dy = 3, 0         # 当前方块在游戏板上的位置（x, y）
-rotation = 0           # 当前方块的旋转状态
+# 游戏规则与状态（方块位置、得分、等级、游戏板等）都由 GameState 管理
+game = GameState(width=width, height=height)
 
-mino = randint(1, 7)   # 当前掉落的方块类型（1-7表示不同形状）
-next_mino = randint(1, 7)  # 下一个将要掉落的方块类型
-
-hold = False           # 是否已持有方块
-hold_mino = -1         # 当前持有的方块类型（-1表示未持有）
+# 自动游戏机器人，游戏中按 A 键开关
+bot = AutoPlayer()
+autoplay = False      # 是否由机器人自动游戏
+bot_time = 0.0        # 机器人下一次放置方块的时间（秒）
 
 name_location = 0      # 名字输入时的光标位置
 name = [65, 65, 65]    # 默认名字的ASCII码（"AAA"）
 
-# 从 paihangbang.txt 文件读取排行榜数据
-with open('paihangbang.txt') as f:
-    lines = f.readlines()
-# 去除每行末尾的换行符
-lines = [line.rstrip('\n') for line in open('paihangbang.txt')]
-
-# 初始化排行榜字典
-leaders = {'AAA': 0, 'BBB': 0, 'CCC': 0}
-# 将文件中的排行榜数据读入字典
-for i in lines:
-    leaders[i.split(' ')[0]] = int(i.split(' ')[1])
-# 按分数对排行榜排序（从高到低）
-leaders = sorted(leaders.items(), key=operator.itemgetter(1), reverse=True)
-
-# 初始化游戏板矩阵：宽度 x (高度 + 1)，初始全为 0
-# matrix[x][y] 表示游戏板上坐标为 (x, y) 的位置是否有方块
-# 0 表示无方块，其他数字代表不同颜色和类型的方块
-matrix = [[0 for y in range(height + 1)] for x in range(width)]
-
-# 主循环：游戏核心控制逻辑
+# 打开排行榜（首次运行时导入 paihangbang.txt），读取前三名；之后的成绩在后台线程中写入
+scores = ScoreWriter(k=3)
+leaders = scores.leaders(3)
+
+# 在线排行榜客户端：成绩在后台线程中发送，服务器连不上时留在本地发件箱里稍后重试
+online = ScoreClient(*server_address) if server_address is not None else None
+
+# 主循环：阻塞等待输入，直到下一帧（游戏中）或下一次闪烁（其他界面）的截止时间，
+# 空闲时不再空转；游戏逻辑按固定步长推进
+sim = FixedTimestep(rate=TICK_RATE)  # 游戏逻辑时钟，每步对应一次 game.tick()
+stats = FrameStats(report_interval=cpu_report_interval)  # 每帧 CPU 时间统计
+frame_interval = 1.0 / display_fps  # 游戏中两帧之间的最短间隔（秒）
+frame_time = 0.0  # 游戏中下一次渲染的时间（秒）
+blink_time = 0.0  # 下一次重绘闪烁画面的时间（秒），0 表示立即重绘
+
 while not done:
+    if start and not pause:
+        events = wait_events(frame_time)
+    else:
+        events = wait_events(blink_time)
+    now = time.perf_counter()  # 高精度时钟
+
     # 暂停界面
     if pause:
-        for event in pygame.event.get():
+        for event in events:
             if event.type == QUIT:
                 done = True  # 如果收到退出事件，关闭窗口
-            elif event.type == USEREVENT:
-                # 设置定时器，用于闪烁效果
-                pygame.time.set_timer(pygame.USEREVENT, 300)
-                # 绘制游戏板
-                draw_board(next_mino, hold_mino, score, level, goal)
-
-                # 渲染暂停文本
-                pause_text = ui_variables.h2_b.render("PAUSED", 1, ui_variables.white)
-                pause_start = ui_variables.h5.render("Press esc to continue", 1, ui_variables.white)
-
-                # 显示暂停文本
-                screen.blit(pause_text, (43, 100))
-                if blink:
-                    screen.blit(pause_start, (40, 160))  # 显示闪烁提示
-                    blink = False
-                else:
-                    blink = True
-
-                pygame.display.update()  # 更新屏幕显示
-
             elif event.type == KEYDOWN:
-                erase_mino(dx, dy, mino, rotation)  # 清除当前方块（准备重绘）
                 if event.key == K_ESCAPE:
                     pause = False  # 按下 ESC 键取消暂停
                     ui_variables.click_sound.play()  # 播放音效
-                    pygame.time.set_timer(pygame.USEREVENT, 1)  # 恢复游戏更新频率
+                    sim.reset()  # 暂停期间的时间不计入下落
+                    frame_time = 0.0
+
+        # 每隔 blink_interval 重绘一次，用于闪烁效果
+        if pause and now >= blink_time:
+            blink_time = now + blink_interval
+            # 绘制游戏板
+            draw_board(game.next_mino, game.hold_mino, game.score, game.level, game.goal)
+
+            # 渲染暂停文本
+            pause_text = ui_variables.texts.render(ui_variables.h2_b, "PAUSED", ui_variables.white)
+            pause_start = ui_variables.texts.render(ui_variables.h5, "Press esc to continue", ui_variables.white)
+
+            # 显示暂停文本
+            screen.blit(pause_text, (43, 100))
+            if blink:
+                screen.blit(pause_start, (40, 160))  # 显示闪烁提示
+                blink = False
+            else:
+                blink = True
+
+            renderer.flush(full=True)  # 叠加了文字，整屏刷新
 
     # 游戏进行界面
     elif start:
-        for event in pygame.event.get():
+        # 按键立即作用于游戏状态并马上渲染，不必等到下一帧
+        for event in events:
             if event.type == QUIT:
                 done = True  # 收到退出事件，关闭窗口
 
-            elif event.type == USEREVENT:
-                # 控制速度：根据是否按下下方向键调整定时器间隔
-                if not game_over:
-                    keys_pressed = pygame.key.get_pressed()
-                    if keys_pressed[K_DOWN]:
-                        pygame.time.set_timer(pygame.USEREVENT, framerate * 1)  # 下落加速
-                    else:
-                        pygame.time.set_timer(pygame.USEREVENT, framerate * 10)  # 正常速度
-
-                # 绘制当前方块和游戏板
-                draw_mino(dx, dy, mino, rotation)
-                draw_board(next_mino, hold_mino, score, level, goal)
-
-                # 清除方块（仅在未游戏结束时执行）
-                if not game_over:
-                    erase_mino(dx, dy, mino, rotation)
-
-                # 方块自动下落
-                if not is_bottom(dx, dy, mino, rotation):
-                    dy += 1  # 向下移动一行
-                else:
-                    # 到达底部后创建新方块
-                    if hard_drop or bottom_count == 6:
-                        hard_drop = False
-                        bottom_count = 0
-                        score += 10 * level  # 增加分数
-
-                        draw_mino(dx, dy, mino, rotation)  # 确认绘制到底部
-                        draw_board(next_mino, hold_mino, score, level, goal)
-
-                        if is_stackable(next_mino):  # 判断是否可以继续放置新方块
-                            mino = next_mino  # 当前方块变为下一个
-                            next_mino = randint(1, 7)  # 随机生成下一个方块
-                            dx, dy = 3, 0  # 重置位置
-                            rotation = 0  # 重置旋转状态
-                            hold = False  # 可再次 Hold
-                        else:
-                            start = False  # 无法继续开始新游戏
-                            game_over = True  # 触发游戏结束
-                            pygame.time.set_timer(pygame.USEREVENT, 1)
-                    else:
-                        bottom_count += 1  # 计数器递增，等待生成新方块
-
-                # 行消除逻辑
-                erase_count = 0
-                for j in range(21):  # 遍历每一行
-                    is_full = True
-                    for i in range(10):  # 检查该行是否满格
-                        if matrix[i][j] == 0:
-                            is_full = False
-                    if is_full:  # 如果该行满格
-                        erase_count += 1
-                        k = j
-                        # 将上方所有行向下移动
-                        while k > 0:
-                            for i in range(10):
-                                matrix[i][k] = matrix[i][k - 1]
-                            k -= 1
-                # 根据消除的行数增加得分并播放对应音效
-                if erase_count == 1:
-                    ui_variables.single_sound.play()
-                    score += 50 * level
-                elif erase_count == 2:
-                    ui_variables.double_sound.play()
-                    score += 150 * level
-                elif erase_count == 3:
-                    ui_variables.triple_sound.play()
-                    score += 350 * level
-                elif erase_count == 4:
-                    ui_variables.tetris_sound.play()
-                    score += 1000 * level
-
-                # 升级逻辑
-                goal -= erase_count  # 减少剩余目标行数
-                if goal < 1 and level < 15:  # 达成目标且等级未满
-                    level += 1  # 提高等级
-                    goal += level * 5  # 更新目标
-                    framerate = int(framerate * 0.8)  # 提高速度
-
             elif event.type == KEYDOWN:
-                erase_mino(dx, dy, mino, rotation)  # 按键前先清除当前方块
-
                 # 按下 ESC 键：进入暂停界面
                 if event.key == K_ESCAPE:
                     ui_variables.click_sound.play()
                     pause = True
+                    blink_time = 0.0
 
-                # 按下空格键：硬降到底部
+                # 按下空格键：硬降到底部并立即锁定
                 elif event.key == K_SPACE:
                     ui_variables.drop_sound.play()
-                    while not is_bottom(dx, dy, mino, rotation):
-                        dy += 1  # 快速下落到最底
-                    hard_drop = True  # 设置硬降标志
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
+                    play_erase_sound(game.hard_drop())
 
                 # 按下 Shift 或 C 键：Hold 功能
                 elif event.key == K_RSHIFT or event.key == K_c:
-                    if hold == False:
+                    if game.hold():
                         ui_variables.move_sound.play()
-                        if hold_mino == -1:  # 第一次 Hold
-                            hold_mino = mino
-                            mino = next_mino
-                            next_mino = randint(1, 7)
-                        else:  # 已有 Hold，交换
-                            hold_mino, mino = mino, hold_mino
-                        dx, dy = 3, 0  # 重置位置
-                        rotation = 0  # 重置旋转
-                        hold = True  # 设置已 Hold 状态
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
-
-                # 按上键或 X 键：向右旋转
+
+                # 按上键或 X 键：向右旋转（含 Kick 机制）
                 elif event.key == K_UP or event.key == K_x:
-                    if is_turnable_r(dx, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        rotation += 1  # 旋转角度 +1
-                    # Kick 机制：尝试微调位置以完成旋转
-                    elif is_turnable_r(dx, dy - 1, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dy -= 1
-                        rotation += 1
-                    elif is_turnable_r(dx + 1, dy, mino, rotation):
+                    if game.rotate(1):
                         ui_variables.move_sound.play()
-                        dx += 1
-                        rotation += 1
-                    elif is_turnable_r(dx - 1, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx -= 1
-                        rotation += 1
-                    elif is_turnable_r(dx, dy - 2, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dy -= 2
-                        rotation += 1
-                    elif is_turnable_r(dx + 2, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx += 2
-                        rotation += 1
-                    elif is_turnable_r(dx - 2, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx -= 2
-                        rotation += 1
-
-                    if rotation == 4:  # 旋转超过最大值则归零
-                        rotation = 0
 
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
-
-                # 按 Z 或 Ctrl 键：向左旋转
+                # 按 Z 或 Ctrl 键：向左旋转（含 Kick 机制）
                 elif event.key == K_z or event.key == K_LCTRL:
-                    if is_turnable_l(dx, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        rotation -= 1  # 旋转角度 -1
-                    # Kick 机制
-                    elif is_turnable_l(dx, dy - 1, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dy -= 1
-                        rotation -= 1
-                    elif is_turnable_l(dx + 1, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx += 1
-                        rotation -= 1
-                    elif is_turnable_l(dx - 1, dy, mino, rotation):
+                    if game.rotate(-1):
                         ui_variables.move_sound.play()
-                        dx -= 1
-                        rotation -= 1
-                    elif is_turnable_l(dx, dy - 2, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dy -= 2
-                        rotation += 1
-                    elif is_turnable_l(dx + 2, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx += 2
-                        rotation += 1
-                    elif is_turnable_l(dx - 2, dy, mino, rotation):
-                        ui_variables.move_sound.play()
-                        dx -= 2
-                        rotation += 1
-
-                    if rotation == -1:  # 旋转角度归为最大值
-                        rotation = 3
-
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
 
                 # 按左键：左移
                 elif event.key == K_LEFT:
-                    if not is_leftedge(dx, dy, mino, rotation):
+                    if game.move(-1):
                         ui_variables.move_sound.play()
-                        dx -= 1  # x 坐标减一实现左移
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
 
                 # 按右键：右移
                 elif event.key == K_RIGHT:
-                    if not is_rightedge(dx, dy, mino, rotation):
+                    if game.move(1):
                         ui_variables.move_sound.play()
-                        dx += 1  # x 坐标加一实现右移
-                    draw_mino(dx, dy, mino, rotation)
-                    draw_board(next_mino, hold_mino, score, level, goal)
 
-        pygame.display.update()  # 更新整个游戏画面
-
-
-        # 游戏结束界面
+                # 按 A 键：开关自动游戏
+                elif event.key == K_a:
+                    ui_variables.click_sound.play()
+                    autoplay = not autoplay
+                    bot_time = now
+
+        if not pause:
+            # 自动游戏：机器人为当前方块选好落点，立即重放它给出的动作序列（以硬降结尾）
+            if autoplay and not game.game_over and now >= bot_time:
+                bot_time = now + bot_interval
+                for action in bot.plan(game):
+                    play_erase_sound(game.act(action))
+                ui_variables.drop_sound.play()
+
+            # 按住下方向键时加速下落
+            soft_drop = pygame.key.get_pressed()[K_DOWN]
+
+            # 按真实经过的时间推进固定步数，方块自动下落、锁定与消行都由引擎处理
+            for _ in range(sim.advance()):
+                play_erase_sound(game.tick(soft_drop))
+
+            if game.game_over:
+                start = False  # 无法继续开始新游戏
+                game_over = True  # 触发游戏结束
+                autoplay = False  # 新的一局默认由玩家操作
+                blink_time = 0.0
+            else:
+                # 绘制游戏板，再叠加当前方块和投影，下落位置在两步之间插值
+                fall = game.fall_progress(sim.alpha, soft_drop)
+                draw_board(game.next_mino, game.hold_mino, game.score, game.level, game.goal,
+                           show_mino=True, fall=fall)
+                renderer.flush()  # 只刷新本帧改动过的区域
+                if now >= frame_time:
+                    frame_time = now + frame_interval  # 没有输入时按 display_fps 渲染
+
+    # 游戏结束界面
     elif game_over:
-        # 处理事件（如按键、定时器等）
-        for event in pygame.event.get():
+        # 处理事件（如按键等）
+        for event in events:
             if event.type == QUIT:
                 done = True  # 如果点击关闭按钮，则退出游戏
 
-            elif event.type == USEREVENT:
-                # 设置定时器为300毫秒（用于闪烁效果）
-                pygame.time.set_timer(pygame.USEREVENT, 300)
-
-                # 渲染“GAME OVER”文字和提示信息
-                over_text_1 = ui_variables.h2_b.render("GAME", 1, ui_variables.white)
-                over_text_2 = ui_variables.h2_b.render("OVER", 1, ui_variables.white)
-                over_start = ui_variables.h5.render("Press return to continue", 1, ui_variables.white)
-
-                # 绘制游戏板（显示最终状态）
-                draw_board(next_mino, hold_mino, score, level, goal)
-
-                # 显示“GAME”和“OVER”文本
-                screen.blit(over_text_1, (58, 75))
-                screen.blit(over_text_2, (62, 105))
-
-                # 渲染玩家输入的名字（每个字符单独渲染）
-                name_1 = ui_variables.h2_i.render(chr(name[0]), 1, ui_variables.white)
-                name_2 = ui_variables.h2_i.render(chr(name[1]), 1, ui_variables.white)
-                name_3 = ui_variables.h2_i.render(chr(name[2]), 1, ui_variables.white)
-
-                # 下划线表示当前编辑的位置
-                underbar_1 = ui_variables.h2.render("_", 1, ui_variables.white)
-                underbar_2 = ui_variables.h2.render("_", 1, ui_variables.white)
-                underbar_3 = ui_variables.h2.render("_", 1, ui_variables.white)
-
-                # 显示名字字符
-                screen.blit(name_1, (65, 147))
-                screen.blit(name_2, (95, 147))
-                screen.blit(name_3, (125, 147))
-
-                # 控制闪烁效果（提示按回车继续）
-                if blink:
-                    screen.blit(over_start, (32, 195))  # 显示提示信息
-                    blink = False
-                else:
-                    # 根据光标位置显示下划线
-                    if name_location == 0:
-                        screen.blit(underbar_1, (65, 145))
-                    elif name_location == 1:
-                        screen.blit(underbar_2, (95, 145))
-                    elif name_location == 2:
-                        screen.blit(underbar_3, (125, 145))
-                    blink = True
-
-                pygame.display.update()  # 更新屏幕显示
-
             elif event.type == KEYDOWN:
+                # 任何按键都立即重绘一次
+                blink_time = 0.0
+
                 # 按下回车键：保存分数并重置游戏
                 if event.key == K_RETURN:
                     ui_variables.click_sound.play()  # 播放音效
 
-                    # 将玩家名字和得分写入排行榜文件
-                    outfile = open('paihangbang.txt', 'a')
-                    outfile.write(chr(name[0]) + chr(name[1]) + chr(name[2]) + ' ' + str(score) + '\n')
-                    outfile.close()
+                    # 提交成绩：立即并入前三名，写入数据库在后台进行
+                    scores.submit(chr(name[0]) + chr(name[1]) + chr(name[2]), game.score)
+                    if online is not None:
+                        online.submit(chr(name[0]) + chr(name[1]) + chr(name[2]), game.score)
 
                     # 重置所有游戏变量
                     game_over = False
-                    hold = False
-                    dx, dy = 3, 0
-                    rotation = 0
-                    mino = randint(1, 7)
-                    next_mino = randint(1, 7)
-                    hold_mino = -1
-                    framerate = 30
-                    score = 0
-                    level = 1
-                    goal = level * 5
-                    bottom_count = 0
-                    hard_drop = False
+                    game.reset()  # 重置游戏板、方块、得分和等级
                     name_location = 0
                     name = [65, 65, 65]  # 默认名字 "AAA"
-                    matrix = [[0 for y in range(height + 1)] for x in range(width)]  # 重置游戏板矩阵
-
-                    # 重新加载排行榜数据
-                    with open('paihangbang.txt') as f:
-                        lines = f.readlines()
-                    lines = [line.rstrip('\n') for line in open('paihangbang.txt')]
-
-                    leaders = {'AAA': 0, 'BBB': 0, 'CCC': 0}
-                    for i in lines:
-                        leaders[i.split(' ')[0]] = int(i.split(' ')[1])
-                    leaders = sorted(leaders.items(), key=operator.itemgetter(1), reverse=True)
 
-                    # 恢复定时器，进入开始界面
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
+                    # 取出更新后的前三名
+                    leaders = scores.leaders(3)
 
                 # 按右箭头：切换名字输入光标位置
                 elif event.key == K_RIGHT:
@@ -792,7 +600,6 @@ while not done:
                         name_location += 1
                     else:
                         name_location = 0
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
 
                 # 按左箭头：切换名字输入光标位置
                 elif event.key == K_LEFT:
@@ -800,7 +607,6 @@ while not done:
                         name_location -= 1
                     else:
                         name_location = 2
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
 
                 # 按上箭头：当前光标位置字符递增（A -> B -> ... -> Z）
                 elif event.key == K_UP:
@@ -809,7 +615,6 @@ while not done:
                         name[name_location] += 1
                     else:
                         name[name_location] = 65  # 循环回到 'A'
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
 
                 # 按下箭头：当前光标位置字符递减（Z -> Y -> ... -> A）
                 elif event.key == K_DOWN:
@@ -818,13 +623,66 @@ while not done:
                         name[name_location] -= 1
                     else:
                         name[name_location] = 90  # 循环回到 'Z'
-                    pygame.time.set_timer(pygame.USEREVENT, 1)
 
-
-        # 开始界面（游戏未启动时）
+        # 每隔 blink_interval 重绘一次，用于闪烁效果
+        if game_over and now >= blink_time:
+            blink_time = now + blink_interval
+
+            # 渲染“GAME OVER”文字和提示信息
+            over_text_1 = ui_variables.texts.render(ui_variables.h2_b, "GAME", ui_variables.white)
+            over_text_2 = ui_variables.texts.render(ui_variables.h2_b, "OVER", ui_variables.white)
+            over_start = ui_variables.texts.render(ui_variables.h5, "Press return to continue", ui_variables.white)
+            # 本局得分在全部历史成绩中的名次（内存中的有序数组上二分查找，不读文件）；
+            # 后台线程还没建好索引时先不显示
+            rank = scores.rank(game.score)
+            if rank is not None:
+                over_rank = ui_variables.texts.render(
+                    ui_variables.h5, "Rank %d / %d" % (rank, scores.count() + 1), ui_variables.white)
+
+            # 绘制游戏板（显示最终状态）
+            draw_board(game.next_mino, game.hold_mino, game.score, game.level, game.goal)
+
+            # 显示“GAME”和“OVER”文本
+            screen.blit(over_text_1, (58, 75))
+            screen.blit(over_text_2, (62, 105))
+            if rank is not None:
+                screen.blit(over_rank, (55, 220))
+
+            # 渲染玩家输入的名字（每个字符单独渲染）
+            name_1 = ui_variables.texts.render(ui_variables.h2_i, chr(name[0]), ui_variables.white)
+            name_2 = ui_variables.texts.render(ui_variables.h2_i, chr(name[1]), ui_variables.white)
+            name_3 = ui_variables.texts.render(ui_variables.h2_i, chr(name[2]), ui_variables.white)
+
+            # 下划线表示当前编辑的位置
+            underbar_1 = ui_variables.texts.render(ui_variables.h2, "_", ui_variables.white)
+            underbar_2 = ui_variables.texts.render(ui_variables.h2, "_", ui_variables.white)
+            underbar_3 = ui_variables.texts.render(ui_variables.h2, "_", ui_variables.white)
+
+            # 显示名字字符
+            screen.blit(name_1, (65, 147))
+            screen.blit(name_2, (95, 147))
+            screen.blit(name_3, (125, 147))
+
+            # 控制闪烁效果（提示按回车继续）
+            if blink:
+                screen.blit(over_start, (32, 195))  # 显示提示信息
+                blink = False
+            else:
+                # 根据光标位置显示下划线
+                if name_location == 0:
+                    screen.blit(underbar_1, (65, 145))
+                elif name_location == 1:
+                    screen.blit(underbar_2, (95, 145))
+                elif name_location == 2:
+                    screen.blit(underbar_3, (125, 145))
+                blink = True
+
+            renderer.flush(full=True)  # 叠加了文字，整屏刷新
+
+    # 开始界面（游戏未启动时）
     else:
         # 处理事件（如退出、按键等）
-        for event in pygame.event.get():
+        for event in events:
             if event.type == QUIT:
                 done = True  # 如果点击关闭按钮，则退出游戏
             elif event.type == KEYDOWN:
@@ -832,49 +690,68 @@ while not done:
                 if event.key == K_SPACE:
                     ui_variables.click_sound.play()  # 播放点击音效
                     start = True  # 设置开始标志为 True，进入游戏主界面
+                    renderer.invalidate()  # 开始界面覆盖了整个屏幕，下一帧整屏重绘
+                    sim.reset()  # 从现在开始计算下落时间
+                    frame_time = 0.0
+
+        # 如果游戏尚未开始，每隔 blink_interval 重绘一次开始界面
+        if not start and now >= blink_time:
+            blink_time = now + blink_interval
+
+            # 填充背景颜色为白色
+            screen.fill(ui_variables.white)
+
+            # 绘制灰色区域（下半部分）
+            pygame.draw.rect(
+                screen,
+                ui_variables.grey_1,
+                Rect(0, 187, 300, 187)
+            )
+
+            # 渲染标题文字
+            title = ui_variables.texts.render(ui_variables.h1, "Eluosi", ui_variables.grey_1)
+            # 渲染“按空格开始”提示文字
+            title_start = ui_variables.texts.render(ui_variables.h5, "Press space to start", ui_variables.white)
+            # 渲染开发者信息
+            title_info = ui_variables.texts.render(ui_variables.h6, "Modified By LRZ_WZH_ZTX", ui_variables.white)
+
+            # 获取排行榜前三名并渲染文本（连接了在线排行榜时显示服务器上的前三名）
+            shown = online.leaders(3) if online is not None and online.top is not None else leaders
+            leader_1 = ui_variables.texts.render(ui_variables.h5_i, '1st ' + shown[0][0] + ' ' + str(shown[0][1]), ui_variables.grey_1)
+            leader_2 = ui_variables.texts.render(ui_variables.h5_i, '2nd ' + shown[1][0] + ' ' + str(shown[1][1]), ui_variables.grey_1)
+            leader_3 = ui_variables.texts.render(ui_variables.h5_i, '3rd ' + shown[2][0] + ' ' + str(shown[2][1]), ui_variables.grey_1)
+
+            # 控制“按空格开始”的闪烁效果
+            if blink:
+                screen.blit(title_start, (92, 195))  # 显示提示信息
+                blink = False
+            else:
+                blink = True  # 切换闪烁状态
+
+            # 显示标题和开发者信息
+            screen.blit(title, (65, 120))
+            screen.blit(title_info, (40, 335))
+
+            # 显示排行榜前三名
+            screen.blit(leader_1, (10, 10))
+            screen.blit(leader_2, (10, 23))
+            screen.blit(leader_3, (10, 36))
+
+            # 成绩写入数据库失败时提示，后台线程会继续重试
+            if scores.unsaved:
+                save_error = ui_variables.texts.render(
+                    ui_variables.h6, "%d score(s) not saved yet, retrying" % scores.unsaved, ui_variables.pink)
+                screen.blit(save_error, (10, 52))
 
-        # 填充背景颜色为白色
-        screen.fill(ui_variables.white)
-
-        # 绘制灰色区域（下半部分）
-        pygame.draw.rect(
-            screen,
-            ui_variables.grey_1,
-            Rect(0, 187, 300, 187)
-        )
-
-        # 渲染标题文字
-        title = ui_variables.h1.render("Eluosi", 1, ui_variables.grey_1)
-        # 渲染“按空格开始”提示文字
-        title_start = ui_variables.h5.render("Press space to start", 1, ui_variables.white)
-        # 渲染开发者信息
-        title_info = ui_variables.h6.render("Modified By LRZ_WZH_ZTX", 1, ui_variables.white)
-
-        # 获取排行榜前三名并渲染文本
-        leader_1 = ui_variables.h5_i.render('1st ' + leaders[0][0] + ' ' + str(leaders[0][1]), 1, ui_variables.grey_1)
-        leader_2 = ui_variables.h5_i.render('2nd ' + leaders[1][0] + ' ' + str(leaders[1][1]), 1, ui_variables.grey_1)
-        leader_3 = ui_variables.h5_i.render('3rd ' + leaders[2][0] + ' ' + str(leaders[2][1]), 1, ui_variables.grey_1)
-
-        # 控制“按空格开始”的闪烁效果
-        if blink:
-            screen.blit(title_start, (92, 195))  # 显示提示信息
-            blink = False
-        else:
-            blink = True  # 切换闪烁状态
-
-        # 显示标题和开发者信息
-        screen.blit(title, (65, 120))
-        screen.blit(title_info, (40, 335))
-
-        # 显示排行榜前三名
-        screen.blit(leader_1, (10, 10))
-        screen.blit(leader_2, (10, 23))
-        screen.blit(leader_3, (10, 36))
-
-        # 如果游戏尚未开始，则更新屏幕并限制帧率为 3 FPS
-        if not start:
             pygame.display.update()
-            clock.tick(3)
 
-# 退出 Pygame
+    # 记录这一帧用掉的 CPU 时间
+    stats.frame()
+
+# 等待后台写完剩余的成绩，退出 Pygame；写不进数据库的成绩只提示，不打断退出
+unsaved = scores.close()
+if unsaved:
+    print("有 %d 条成绩没能保存: %r" % (unsaved, scores.error))
+if online is not None:
+    online.close()
 pygame.quit()
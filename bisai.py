@@ -0,0 +1,200 @@
+# 自我对局与锦标赛：用多进程让不同参数的机器人在无界面的引擎上各自打完若干局，汇总成绩
+# 用法示例：python bisai.py --games 200 --configs peizhi.json --output jieguo.json
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+
+from yinqing import GameState
+from jiqiren import AutoPlayer
+
+# 未指定配置文件时参赛的机器人：默认参数的束搜索，以及只看当前方块的贪心版本
+default_configs = [
+    {'name': 'beam4', 'beam_width': 4},
+    {'name': 'greedy', 'beam_width': 1},
+]
+
+# 子进程中复用的对象，由 _init_worker() 创建
+_queue = None
+_game = None
+_players = None
+_max_pieces = None
+
+
+def _init_worker(queue, configs, width, height, max_pieces):
+    """子进程初始化：每个进程只创建一个引擎实例和每种配置一个机器人，之后所有对局共用。"""
+    global _queue, _game, _players, _max_pieces
+    _queue = queue
+    _game = GameState(width=width, height=height)
+    _players = {
+        config['name']: AutoPlayer(weights=config.get('weights'), beam_width=config.get('beam_width', 4))
+        for config in configs
+    }
+    _max_pieces = max_pieces
+
+
+def play(game, player, seed, max_pieces):
+    """
+    让机器人用给定的种子打一局，直到游戏结束或放满 max_pieces 个方块。
+
+    参数:
+    game (yinqing.GameState): 复用的引擎实例，会被重置。
+    player (jiqiren.AutoPlayer): 机器人。
+    seed: 随机数种子。
+    max_pieces (int): 一局最多放置的方块数。
+
+    返回:
+    dict: 得分、到达的等级、消除行数、方块数、每秒放置的方块数等成绩。
+    """
+    game.reset(seed)
+    start = time.perf_counter()
+    while not game.game_over and game.pieces < max_pieces:
+        for action in player.plan(game):
+            game.act(action)
+    seconds = time.perf_counter() - start
+    return {
+        'seed': seed,
+        'score': game.score,
+        'level': game.level,
+        'lines': game.lines,
+        'pieces': game.pieces,
+        'game_over': game.game_over,
+        'seconds': seconds,
+        'pps': game.pieces / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _play_chunk(jobs):
+    """子进程任务：依次打完一批 (配置名, 种子) 对局，每局结束就把成绩放入队列。"""
+    for name, seed in jobs:
+        result = play(_game, _players[name], seed, _max_pieces)
+        result['config'] = name
+        _queue.put(result)
+    return len(jobs)
+
+
+def summarize(results):
+    """
+    按配置汇总成绩。
+
+    参数:
+    results (list): 每局的成绩字典。
+
+    返回:
+    dict: 配置名 -> 局数、得分的平均值/中位数/最大值/最小值、平均行数、平均等级、平均方块数和平均速度。
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(result['config'], []).append(result)
+
+    summary = {}
+    for name, games in groups.items():
+        scores = [game['score'] for game in games]
+        summary[name] = {
+            'games': len(games),
+            'score_mean': statistics.mean(scores),
+            'score_median': statistics.median(scores),
+            'score_max': max(scores),
+            'score_min': min(scores),
+            'lines_mean': statistics.mean(game['lines'] for game in games),
+            'level_mean': statistics.mean(game['level'] for game in games),
+            'pieces_mean': statistics.mean(game['pieces'] for game in games),
+            'pps_mean': statistics.mean(game['pps'] for game in games),
+            'game_over_rate': sum(game['game_over'] for game in games) / len(games),
+        }
+    return summary
+
+
+def run(configs, games, seed=0, workers=None, chunk=8, max_pieces=1000, width=10, height=20, on_result=None):
+    """
+    每种配置用同样的 games 个种子各打一局，分批交给进程池，边打边收集成绩。
+
+    参数:
+    configs (list): 机器人配置，每项包含 name，可选 weights 和 beam_width。
+    games (int): 每种配置的对局数。
+    seed (int): 第一局的种子，第 i 局使用 seed + i。
+    workers (int): 进程数，缺省为 CPU 核数。
+    chunk (int): 每个任务包含的对局数，越大进程间通信越少。
+    max_pieces (int): 一局最多放置的方块数。
+    width (int): 游戏板宽度。
+    height (int): 游戏板可见高度。
+    on_result: 每收到一局成绩时调用的函数。
+
+    返回:
+    list: 所有对局的成绩（按完成顺序）。
+    """
+    jobs = [(config['name'], seed + i) for i in range(games) for config in configs]
+    chunks = [jobs[i:i + chunk] for i in range(0, len(jobs), chunk)]
+
+    with multiprocessing.Manager() as manager:
+        queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(queue, configs, width, height, max_pieces)) as pool:
+            futures = [pool.submit(_play_chunk, batch) for batch in chunks]
+            results = []
+            while len(results) < len(jobs):
+                try:
+                    result = queue.get(timeout=0.5)
+                except Empty:
+                    # 某个任务出错时不会再有成绩送来，直接抛出它的异常
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()
+                    continue
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+            for future in futures:
+                future.result()  # 子进程中的异常在这里抛出
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="让不同参数的机器人在无界面的引擎上对局并汇总成绩")
+    parser.add_argument('--games', type=int, default=20, help="每种配置的对局数")
+    parser.add_argument('--configs', help="机器人配置的 JSON 文件（列表，每项含 name、weights、beam_width）")
+    parser.add_argument('--seed', type=int, default=0, help="第一局的种子")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，缺省为 CPU 核数")
+    parser.add_argument('--chunk', type=int, default=8, help="每个任务包含的对局数")
+    parser.add_argument('--max-pieces', type=int, default=1000, help="一局最多放置的方块数")
+    parser.add_argument('--results', help="逐局成绩的输出文件（每行一个 JSON）")
+    parser.add_argument('--output', help="汇总统计的输出文件（JSON）")
+    args = parser.parse_args(argv)
+
+    configs = default_configs
+    if args.configs:
+        with open(args.configs) as f:
+            configs = json.load(f)
+
+    out = open(args.results, 'w') if args.results else None
+
+    def report(result):
+        print("%-10s 种子 %-6d 得分 %-8d 等级 %-3d 行数 %-5d 方块 %-5d %.1f 块/秒" % (
+            result['config'], result['seed'], result['score'], result['level'],
+            result['lines'], result['pieces'], result['pps']))
+        if out is not None:
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+
+    try:
+        results = run(configs, args.games, seed=args.seed, workers=args.workers, chunk=args.chunk,
+                      max_pieces=args.max_pieces, on_result=report)
+    finally:
+        if out is not None:
+            out.close()
+
+    summary = summarize(results)
+    json.dump(summary, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
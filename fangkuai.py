@@ -1,3 +1,6 @@
+from collections import namedtuple
+
+
 class tetrimino:
 ########################################### I
     mino_map = [
@@ -190,3 +193,93 @@ class tetrimino:
             ]
         ]
     ]
+
+
+# 编译后的方块形状
+# cells: 被占用格子相对左上角的偏移 ((dx, dy), ...)，固定为 4 个
+# bbox: 被占用格子的包围盒 (min_dx, min_dy, max_dx, max_dy)
+# bottoms: 每个被占用列最低的格子 ((dx, max_dy), ...)，按 dx 从小到大
+mino_shape = namedtuple('mino_shape', ['cells', 'bbox', 'bottoms'])
+
+
+def compile_shapes(mino_map):
+    """
+    把 4x4 形状矩阵编译成只包含被占用格子的形状表。
+
+    参数:
+    mino_map (list): tetrimino.mino_map 格式的形状矩阵。
+
+    返回:
+    tuple: 按 shapes[mino - 1][r] 取值的 mino_shape 表。
+    """
+    shapes = []
+    for rotations in mino_map:
+        compiled = []
+        for grid in rotations:
+            cells = tuple((j, i) for i in range(4) for j in range(4) if grid[i][j] != 0)
+            xs = [cx for cx, cy in cells]
+            ys = [cy for cx, cy in cells]
+            bottoms = tuple(
+                (cx, max(cy for x, cy in cells if x == cx))
+                for cx in sorted(set(xs))
+            )
+            compiled.append(mino_shape(cells, (min(xs), min(ys), max(xs), max(ys)), bottoms))
+        shapes.append(tuple(compiled))
+    return tuple(shapes)
+
+
+# 导入时编译一次
+tetrimino.shapes = compile_shapes(tetrimino.mino_map)
+
+
+# SRS 踢墙表（标准表中 y 轴向上，这里写的是原始数值，编译时取反为 y 轴向下）
+# 按 (旋转前状态, 旋转后状态) 取出依次尝试的位移 ((ox, oy), ...)，状态 0-3 依次为 0、R、2、L
+srs_kicks = {
+    (0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+}
+
+# I 方块单独的 SRS 踢墙表
+srs_i_kicks = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+}
+
+# O 方块旋转后形状不变，只尝试原地旋转
+srs_o_kicks = {key: ((0, 0),) for key in srs_kicks}
+
+
+def compile_kicks(kicks, i_kicks, o_kicks):
+    """
+    把 y 轴向上的踢墙表转换为游戏板使用的 y 轴向下坐标，并按方块类型排列。
+
+    参数:
+    kicks (dict): J、L、S、T、Z 共用的踢墙表。
+    i_kicks (dict): I 方块的踢墙表。
+    o_kicks (dict): O 方块的踢墙表。
+
+    返回:
+    tuple: 按 kicks[mino - 1][(r, target)] 取值的位移表。
+    """
+    def flip(table):
+        return {key: tuple((ox, -oy) for ox, oy in offsets) for key, offsets in table.items()}
+
+    common = flip(kicks)
+    # 方块顺序与 mino_map 相同：I、J、L、O、S、T、Z
+    return (flip(i_kicks), common, common, flip(o_kicks), common, common, common)
+
+
+# 导入时编译一次
+tetrimino.kicks = compile_kicks(srs_kicks, srs_i_kicks, srs_o_kicks)
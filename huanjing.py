@@ -0,0 +1,147 @@
+# 强化学习环境：按 gym 的约定包装游戏规则，reset() / step(action) -> obs, reward, done, info
+# 不依赖 pygame，可以在没有显示器的环境中运行；观测是游戏板缓冲区的只读 NumPy 视图，每步不复制
+from random import Random
+
+import numpy as np
+
+from yinqing import GameState, ACTIONS
+from piliang import BatchGame
+
+
+def _readonly(array):
+    """返回 array 的只读视图（共享同一块内存）。"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class Env:
+    """
+    单局游戏的环境。
+
+    观测是一个字典：'board' 为 (rows, width) 的 uint8 只读视图，直接指向 ByteBoard 的
+    格子缓冲区（第 0 行是隐藏的出生行，0 为空，1-7 为方块颜色），'mino'、'next_mino'、
+    'hold_mino' 为方块类型。每一步返回的都是同一个字典，内容随游戏更新；
+    需要保留某一步的观测时，调用方应自行复制。奖励为本步得分的增加量。
+    """
+
+    # 可用的动作编号，与 yinqing.ACTIONS 相同
+    actions = ACTIONS
+
+    def __init__(self, width=10, height=20, seed=None):
+        """
+        参数:
+        width (int): 游戏板宽度。
+        height (int): 游戏板可见高度。
+        seed: 随机数种子。
+        """
+        self.game = GameState(seed=seed, width=width, height=height, board='byte')
+        board = self.game.board
+        # ByteBoard 的清空和消行都在原缓冲区上进行，视图始终有效
+        cells = np.frombuffer(board.cells, dtype=np.uint8).reshape(board.rows, board.width)
+        self.observation = {'board': _readonly(cells), 'mino': 0, 'next_mino': 0, 'hold_mino': -1}
+
+    def _observe(self):
+        """更新并返回观测字典。"""
+        game = self.game
+        observation = self.observation
+        observation['mino'] = game.mino
+        observation['next_mino'] = game.next_mino
+        observation['hold_mino'] = game.hold_mino
+        return observation
+
+    def reset(self, seed=None):
+        """
+        开始新的一局。
+
+        参数:
+        seed: 如果给出，则重新设置随机数种子。
+
+        返回:
+        dict: 观测。
+        """
+        self.game.reset(seed)
+        return self._observe()
+
+    def step(self, action):
+        """
+        执行一个动作并推进一个 tick。
+
+        参数:
+        action (int): yinqing.ACTIONS 中的动作编号。
+
+        返回:
+        tuple: (观测, 奖励, 是否结束, 附加信息)。
+        """
+        game = self.game
+        score = game.score
+        lines = game.step(action)
+        info = {'lines': lines, 'score': game.score, 'level': game.level, 'pieces': game.pieces}
+        return self._observe(), game.score - score, game.game_over, info
+
+
+class VecEnv:
+    """
+    同时进行 n 局游戏的向量化环境，由 piliang.BatchGame 批量推进。
+
+    观测字典中的 'board' 为 (n, rows, width) 的只读视图，'mino'、'next_mino'、'hold_mino'
+    为长度 n 的只读视图，都直接指向 BatchGame 的状态数组。
+    某一局结束时，step() 返回的 done 为 True，奖励和 info 中的最终得分属于结束的那一局，
+    返回的观测则已经是自动重置后的新局。
+    """
+
+    actions = ACTIONS
+
+    def __init__(self, n, width=10, height=20, seeds=None):
+        """
+        参数:
+        n (int): 同时进行的游戏局数。
+        width (int): 游戏板宽度。
+        height (int): 游戏板可见高度。
+        seeds: 长度为 n 的随机数种子序列，缺省为 0 到 n - 1。
+        """
+        self.n = n
+        self.game = BatchGame(n, seeds=seeds, width=width, height=height)
+        game = self.game
+        self.observation = {
+            'board': _readonly(game.colors),
+            'mino': _readonly(game.mino),
+            'next_mino': _readonly(game.next_mino),
+            'hold_mino': _readonly(game.hold_mino),
+        }
+
+    def reset(self, seeds=None):
+        """
+        重置所有游戏。
+
+        参数:
+        seeds: 如果给出，则按它重新设置每一局的随机数种子。
+
+        返回:
+        dict: 观测。
+        """
+        if seeds is not None:
+            self.game.rngs = [Random(seed) for seed in seeds]
+        self.game.reset()
+        return self.observation
+
+    def step(self, actions):
+        """
+        每局执行一个动作并推进一个 tick，结束的游戏自动重置。
+
+        参数:
+        actions: 长度为 n 的动作编号数组。
+
+        返回:
+        tuple: (观测, 奖励数组, 结束标记数组, 附加信息)，
+               附加信息包含本步消除的行数 'lines' 和各局当前（结束的局为最终）得分 'score'。
+        """
+        game = self.game
+        score = game.score.copy()
+        lines = game.step(actions)
+        reward = game.score - score
+        done = game.game_over.copy()
+        info = {'lines': lines, 'score': game.score.copy()}
+        if done.any():
+            game.reset(done)
+        return self.observation, reward, done, info
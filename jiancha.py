@@ -0,0 +1,191 @@
+# 一致性检查：确认同一套规则的不同实现给出完全相同的结果，修改规则或游戏板之后运行
+#   lockstep  piliang.BatchGame 与同样种子的 yinqing.GameState 执行同样的动作，逐步比较
+#   undo      GameState.apply_placement() / undo() 和游戏板的 make() / unmake() 能精确还原，
+#             机器人搜索后游戏保持不变；在每种游戏板上检查
+# 任何不一致都抛出 AssertionError 并指出第几步、第几局、哪个属性，全部通过时打印统计
+# 用法示例：python jiancha.py lockstep --games 64 --steps 3000
+#           python jiancha.py undo --seed 3
+import argparse
+import random
+import time
+
+from yinqing import GameState, ACTIONS
+from jiqiren import AutoPlayer, placements
+from qipan import board_types
+
+# 逐步比较的状态：GameState 的属性与 BatchGame 的同名数组一一对应
+state_fields = ('dx', 'dy', 'rotation', 'mino', 'next_mino', 'hold_mino', 'hold_used', 'score', 'level',
+                'goal', 'lines', 'pieces', 'game_over', 'gravity_acc', 'lock_ticks')
+
+
+def lockstep(games=16, steps=2000, seed=0, width=10, noise=0.05, board_every=1):
+    """
+    让 BatchGame 与同样种子的 GameState 逐局执行同样的动作，每一步比较消除的行数和 state_fields，
+    每隔 board_every 步比较一次游戏板。前一半的局由机器人给出动作（混入比例为 noise 的随机动作），
+    能连续消行、升级；其余的局完全随机，覆盖踢墙、Hold 和堆满结束。结束的局重置后继续。
+
+    参数:
+    games (int): 同时比较的局数。
+    steps (int): 比较的步数。
+    seed (int): 第一局的种子，第 k 局为 seed + k；动作的随机数也由它决定。
+    width (int): 游戏板宽度。
+    noise (float): 机器人控制的局中改用随机动作的比例。
+    board_every (int): 每隔多少步比较一次游戏板。
+
+    返回:
+    dict: 比较的局数、步数、总共消除的行数、到达的最高等级和结束的局数。
+    """
+    from piliang import BatchGame  # 需要 NumPy，只在这项检查中导入
+
+    batch = BatchGame(games, seeds=range(seed, seed + games), width=width)
+    single = [GameState(seed=seed + k, width=width) for k in range(games)]
+    bot = AutoPlayer(beam_width=1)  # 只需要能连续消行，贪心版本就够了
+    rng = random.Random(seed)
+    plans = [[] for k in range(games)]  # 机器人控制的局还没执行的动作
+    lines = 0
+    max_level = 1
+    finished = 0
+
+    for step in range(steps):
+        actions = []
+        for k, game in enumerate(single):
+            if k < games // 2 and rng.random() >= noise:
+                if not plans[k]:
+                    plans[k] = bot.plan(game)[::-1]
+                actions.append(plans[k].pop())
+            else:
+                actions.append(rng.choice(ACTIONS))
+
+        erased = batch.step(actions)
+        for k, game in enumerate(single):
+            expected = game.step(actions[k])
+            if expected != erased[k]:
+                raise AssertionError("第 %d 步第 %d 局消除的行数不同: GameState %d, BatchGame %d"
+                                     % (step, k, expected, erased[k]))
+            for field in state_fields:
+                if getattr(game, field) != getattr(batch, field)[k]:
+                    raise AssertionError("第 %d 步第 %d 局的 %s 不同: GameState %s, BatchGame %s"
+                                         % (step, k, field, getattr(game, field), getattr(batch, field)[k]))
+            if step % board_every == 0 and [list(column) for column in game.matrix] != batch.matrix(k).tolist():
+                raise AssertionError("第 %d 步第 %d 局的游戏板不同" % (step, k))
+            max_level = max(max_level, game.level)
+
+        over = [k for k, game in enumerate(single) if game.game_over]
+        if over:
+            batch.reset(over)
+            for k in over:
+                lines += single[k].lines
+                single[k].reset()
+                plans[k] = []
+            finished += len(over)
+
+    lines += sum(game.lines for game in single)
+    return {'games': games, 'steps': steps, 'lines': lines, 'max_level': max_level, 'finished': finished}
+
+
+def _snapshot(game):
+    """返回游戏和游戏板的全部状态（包括各种存储方式特有的数组），用于比较撤销前后是否相同。"""
+    board = game.board
+    storage = tuple(bytes(getattr(board, name)) if name == 'cells' else list(getattr(board, name))
+                    for name in ('bits', 'counts', 'cells') if hasattr(board, name))
+    return ([list(column) for column in board.matrix], storage, board.tops[:], board.fills[:],
+            board.holes, board.bumpiness, board.max_height, board.hash,
+            game.score, game.level, game.goal, game.lines, game.pieces, game.drawn,
+            game.mino, game.next_mino, game.hold_mino, game.hold_used,
+            game.dx, game.dy, game.rotation, game.gravity_acc, game.lock_ticks, game.game_over, game.hash)
+
+
+def undo(games=4, pieces=120, seed=0, width=6):
+    """
+    在每种游戏板上下若干局（多数方块按机器人的选择，其余随机放置），每放一个方块之前，对当前方块的每个落点（随机地先 Hold）
+    调用 apply_placement()，再在放好的局面上对下一个方块的几个落点做一层 apply_placement() / undo()
+    和 board.make() / unmake()，每次撤销后都与之前的快照比较；最后检查 AutoPlayer.plan() 没有改动游戏。
+    游戏板较窄时消行频繁，覆盖 restore_lines() 的各种情况。
+
+    参数:
+    games (int): 每种游戏板下的局数。
+    pieces (int): 每局最多放置的方块数。
+    seed (int): 第一局的种子。
+    width (int): 游戏板宽度。
+
+    返回:
+    dict: 检查过的落点数和这些落点消除的行数。
+    """
+    bot = AutoPlayer(beam_width=2)
+    checked = 0
+    cleared = 0
+    for kind in board_types:
+        for n in range(games):
+            game = GameState(seed=seed + n, width=width, board=kind)
+            rng = random.Random(seed + n)
+            while not game.game_over and game.pieces < pieces:
+                before = _snapshot(game)
+                options = placements(game.board, game.dx, game.dy, game.mino, game.rotation)
+                for path, x, y, r in options:
+                    hold = not game.hold_used and rng.random() < 0.2
+                    if hold:
+                        mino = game.next_mino if game.hold_mino == -1 else game.hold_mino
+                        held = placements(game.board, game.spawn_x, 0, mino, 0)
+                        if not held:
+                            continue
+                        path, x, y, r = rng.choice(held)
+                    cleared += game.apply_placement(x, y, r, hold)
+                    placed = _snapshot(game)
+                    if not game.game_over:
+                        for path2, x2, y2, r2 in placements(game.board, game.dx, game.dy, game.mino, game.rotation)[:4]:
+                            game.apply_placement(x2, y2, r2)
+                            game.undo()
+                            if _snapshot(game) != placed:
+                                raise AssertionError("%s 游戏板第 %d 局: 嵌套的 undo() 没有还原" % (kind, n))
+                            lines, move = game.board.make(x2, y2, game.mino, r2)
+                            game.board.unmake(move)
+                            if _snapshot(game) != placed:
+                                raise AssertionError("%s 游戏板第 %d 局: unmake() 没有还原" % (kind, n))
+                    game.undo()
+                    if _snapshot(game) != before:
+                        raise AssertionError("%s 游戏板第 %d 局第 %d 个方块: undo() 没有还原 (%d, %d, %d, hold=%s)"
+                                             % (kind, n, game.pieces, x, y, r, hold))
+                    checked += 1
+                actions = bot.plan(game)
+                if _snapshot(game) != before:
+                    raise AssertionError("%s 游戏板第 %d 局: AutoPlayer.plan() 改动了游戏" % (kind, n))
+                # 多数时候按机器人的动作下，局面能维持下去；偶尔随机放置，堆出更乱的局面
+                if options and rng.random() < 0.3:
+                    path, x, y, r = rng.choice(options)
+                    game.apply_placement(x, y, r)
+                else:
+                    for action in actions:
+                        game.act(action)
+    return {'placements': checked, 'lines': cleared}
+
+
+# 可以运行的检查
+checks = {
+    'lockstep': lockstep,
+    'undo': undo,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查同一套规则的不同实现是否给出相同的结果")
+    parser.add_argument('checks', nargs='*', help="要运行的检查（%s），缺省为全部" % ' / '.join(checks))
+    parser.add_argument('--games', type=int, default=None, help="局数（lockstep 缺省 16，undo 缺省每种游戏板 4）")
+    parser.add_argument('--steps', type=int, default=2000, help="lockstep 比较的步数")
+    parser.add_argument('--seed', type=int, default=0, help="第一局的种子")
+    args = parser.parse_args(argv)
+    for name in args.checks:
+        if name not in checks:
+            parser.error("未知的检查: %s" % name)
+
+    options = {
+        'lockstep': {'games': args.games or 16, 'steps': args.steps, 'seed': args.seed},
+        'undo': {'games': args.games or 4, 'seed': args.seed},
+    }
+    for name in args.checks or tuple(checks):
+        start = time.perf_counter()
+        result = checks[name](**options[name])
+        print("%-10s 通过 %.1f 秒 %s" % (name, time.perf_counter() - start, result))
+
+
+if __name__ == '__main__':
+    main()
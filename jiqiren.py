@@ -0,0 +1,213 @@
+# 自动游戏机器人：枚举方块所有可到达的落点，用加权启发式评分，
+# 再对 NEXT 预览做束搜索，输出主循环可以直接重放的动作序列
+from collections import deque
+from fangkuai import tetrimino
+from yinqing import LEFT, RIGHT, ROTATE_R, ROTATE_L, HARD_DROP, HOLD
+from sanlie import TranspositionTable, piece_hash
+
+# 启发式权重：总列高、消除行数、空洞数、相邻列高差之和
+default_weights = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+# 堆叠到达出生行（即将失败）时的评分
+lost_score = -1e9
+
+
+def _footprints():
+    """
+    找出占用格子相同的旋转状态（O 的 4 个状态，I、S、Z 的 0 与 2、1 与 3 只差一个平移）。
+
+    返回:
+    tuple: 按 table[mino - 1][r] 取值的 (r0, ox, oy)：状态 r 的方块放在 (x, y) 时，
+           与状态 r0 放在 (x + ox, y + oy) 时占用的格子完全相同。
+    """
+    table = []
+    for rotations in tetrimino.shapes:
+        canonical = []
+        for shape in rotations:
+            min_x, min_y = shape.bbox[0], shape.bbox[1]
+            cells = sorted((cx - min_x, cy - min_y) for cx, cy in shape.cells)
+            for r0, other in enumerate(rotations):
+                if sorted((cx - other.bbox[0], cy - other.bbox[1]) for cx, cy in other.cells) == cells:
+                    canonical.append((r0, min_x - other.bbox[0], min_y - other.bbox[1]))
+                    break
+        table.append(tuple(canonical))
+    return tuple(table)
+
+
+# 导入时计算一次
+footprints = _footprints()
+
+
+def placements(board, x, y, mino, r):
+    """
+    从 (x, y, r) 出发，只用左右移动和旋转（与主循环的按键相同）能到达的所有位置，
+    枚举从这些位置直接落下得到的落点。占用格子完全相同的落点只保留路径最短的一个。
+
+    参数:
+    board: qipan 中的游戏板。
+    x (int): 方块左上角的x坐标。
+    y (int): 方块左上角的y坐标。
+    mino (int): 方块类型（1-7）。
+    r (int): 旋转状态（0-3）。
+
+    返回:
+    list: [(path, x, y, r), ...]，path 为到达该位置的动作元组（不含最后的硬降），
+          y 为落下后的坐标；起始位置已有冲突时为空列表。
+    """
+    if board.collides(x, y, mino, r):
+        return []
+
+    canonical = footprints[mino - 1]
+    start = (x, y, r)
+    paths = {start: ()}
+    queue = deque([start])
+    landings = {}
+
+    # 广度优先搜索，先找到的路径就是最短的
+    while queue:
+        state = queue.popleft()
+        cx, cy, cr = state
+        path = paths[state]
+
+        landing = cy + board.drop_distance(cx, cy, mino, cr)
+        r0, ox, oy = canonical[cr]
+        footprint = (cx + ox, landing + oy, r0)
+        if footprint not in landings:
+            landings[footprint] = (path, cx, landing, cr)
+
+        moves = []
+        if not board.collides(cx - 1, cy, mino, cr):
+            moves.append((LEFT, (cx - 1, cy, cr)))
+        if not board.collides(cx + 1, cy, mino, cr):
+            moves.append((RIGHT, (cx + 1, cy, cr)))
+        for action, direction in ((ROTATE_R, 1), (ROTATE_L, -1)):
+            target = (cr + direction) % 4
+            offset = board.kick(cx, cy, mino, cr, target)
+            if offset is not None:
+                moves.append((action, (cx + offset[0], cy + offset[1], target)))
+
+        for action, nxt in moves:
+            if nxt not in paths:
+                paths[nxt] = path + (action,)
+                queue.append(nxt)
+
+    return list(landings.values())
+
+
+class AutoPlayer:
+    """
+    自动游戏机器人。
+
+    对当前方块（以及 Hold 后换上的方块）枚举所有落点，按 weights 对落下后的
+    游戏板评分，保留得分最高的 beam_width 个结果，再用 NEXT 预览的方块继续搜索一层，
+    最后选出第一步的动作序列。评分直接读取游戏板增量维护的列高、空洞数和表面起伏。
+
+    每个 (游戏板, 方块, 起始位置) 展开得到的落点保存在置换表中：上一次搜索
+    在 NEXT 那一层展开过的局面，往往就是下一次搜索的第一层，可以直接取用。
+    """
+
+    def __init__(self, weights=None, beam_width=4, table=None):
+        """
+        参数:
+        weights (dict): 启发式权重，缺省使用 default_weights。
+        beam_width (int): 束搜索每层保留的结果数量。
+        table (sanlie.TranspositionTable): 保存展开结果的置换表，缺省新建一个。
+        """
+        self.weights = dict(default_weights)
+        if weights:
+            self.weights.update(weights)
+        self.beam_width = beam_width
+        self.table = table if table is not None else TranspositionTable(capacity=64)
+
+    def expand(self, board, x, y, mino, r):
+        """
+        枚举方块从 (x, y, r) 出发的所有落点，结果按局面的散列值保存在置换表中。
+
+        返回:
+        tuple: ((path, px, py, pr), ...)，与 placements() 相同。
+        """
+        key = board.hash ^ piece_hash(mino, r, x, y)
+        children = self.table.probe(key)
+        if children is None:
+            children = tuple(placements(board, x, y, mino, r))
+            self.table.store(key, children)
+        return children
+
+    def evaluate(self, board, lines):
+        """
+        给落下方块后的游戏板评分。
+
+        参数:
+        board: qipan 中的游戏板。
+        lines (int): 到达这个局面一共消除的行数。
+
+        返回:
+        float: 评分，越大越好。
+        """
+        if board.max_height >= board.rows - 1:
+            return lost_score  # 堆叠已经到达出生行
+        weights = self.weights
+        height = board.rows * board.width - sum(board.tops)
+        return (weights['height'] * height + weights['lines'] * lines
+                + weights['holes'] * board.holes + weights['bumpiness'] * board.bumpiness)
+
+    def plan(self, game):
+        """
+        为当前方块选择落点。
+
+        参数:
+        game (yinqing.GameState): 当前的游戏状态（不会被修改）。
+
+        返回:
+        list: 动作序列，以 HARD_DROP 结尾，可依次交给 GameState.act() 重放。
+        """
+        spawn = (game.spawn_x, 0, 0)
+        # 每个选项：(前置动作, 起始位置, 依次要放置的方块)
+        roots = [([], (game.dx, game.dy, game.rotation), [game.mino, game.next_mino])]
+        if not game.hold_used:
+            if game.hold_mino == -1:
+                roots.append(([HOLD], spawn, [game.next_mino]))  # Hold 后的下一个方块未知
+            else:
+                roots.append(([HOLD], spawn, [game.hold_mino, game.next_mino]))
+        depth = min(len(pieces) for prefix, start, pieces in roots)  # 各选项搜索同样的层数才能比较
+
+        # 整个搜索只复制一次游戏板：每个落点用 make() 放下、评分后再 unmake() 撤销，
+        # 束中只保存到达该局面要依次放置的 (x, y, 方块, 旋转)，展开时在这块游戏板上重放
+        board = game.board.copy()
+        best_score, best_actions = None, [HARD_DROP]
+        for prefix, start, pieces in roots:
+            beam = [(0.0, prefix, (), 0)]
+            for level, mino in enumerate(pieces[:depth]):
+                x, y, r = start if level == 0 else spawn
+                children = []
+                for score, actions, moves, lines in beam:
+                    made = [board.make(*move)[1] for move in moves]
+                    for path, px, py, pr in self.expand(board, x, y, mino, r):
+                        cleared, move = board.make(px, py, mino, pr)
+                        total = lines + cleared
+                        if level == 0:
+                            child_actions = actions + list(path) + [HARD_DROP]
+                        else:
+                            child_actions = actions
+                        children.append((self.evaluate(board, total), child_actions,
+                                         moves + ((px, py, mino, pr),), total))
+                        board.unmake(move)
+                    for move in reversed(made):
+                        board.unmake(move)
+                if not children:
+                    # 无处可放，这一支必然失败
+                    beam = [(lost_score, actions, moves, lines) for score, actions, moves, lines in beam]
+                    break
+                children.sort(key=lambda child: child[0], reverse=True)
+                beam = children[:self.beam_width]
+
+            score, actions = beam[0][0], beam[0][1]
+            if actions and actions[-1] == HARD_DROP and (best_score is None or score > best_score):
+                best_score, best_actions = score, actions
+
+        return best_actions
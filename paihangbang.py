@@ -0,0 +1,716 @@
+# 排行榜存储：用带索引的 SQLite 数据库代替只追加的 paihangbang.txt
+# 插入和按分数、按名字的查询都走 B 树索引，记录再多，启动和游戏结束时的开销也基本不变
+# ScoreWriter 在后台线程中批量写入，主线程只更新内存中的前 K 名
+# ScoreIndex 是全部分数的有序数组，名次、百分位和区间计数都用二分查找回答
+import bisect
+import heapq
+import json
+import mmap
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+
+# 记录不足时补齐排行榜显示的默认条目（与原先的默认字典相同）
+default_leaders = [('AAA', 0), ('BBB', 0), ('CCC', 0)]
+
+# 落盘策略与 SQLite 的 synchronous 设置的对应关系（配合 WAL 日志）：
+# 'off' 从不主动 fsync，交给操作系统；'batch' 只在检查点时 fsync，掉电可能丢失最近几批但不会损坏数据库；
+# 'always' 每次提交都 fsync
+fsync_policies = {'off': 'OFF', 'batch': 'NORMAL', 'always': 'FULL'}
+
+# 能保存的分数范围：SQLite 的 INTEGER 和 ScoreIndex 的 array('q') 都是有符号 64 位整数
+min_score = -(1 << 63)
+max_score = (1 << 63) - 1
+
+
+def check_score(score):
+    """
+    把分数转换为整数，并检查它在 [min_score, max_score] 之内。
+
+    参数:
+    score: 分数，整数、浮点数或数字字符串。
+
+    返回:
+    int: 分数；超出范围时抛出 ValueError（无穷大的浮点数由 int() 抛出 OverflowError）。
+    """
+    score = int(score)
+    if not min_score <= score <= max_score:
+        raise ValueError("分数超出范围: %d" % score)
+    return score
+
+
+def parse_line(line):
+    """
+    解析 paihangbang.txt 中的一行 "名字 分数"。
+
+    参数:
+    line (str): 一行文本，也可以是 UTF-8 编码的 bytes。
+
+    返回:
+    tuple: (名字, 分数)；格式不对时返回 None。
+    """
+    parts = line.split()
+    if len(parts) != 2:
+        return None
+    name, score = parts
+    try:
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        return name, check_score(score)
+    except ValueError:  # 包括 UnicodeDecodeError 和超出范围的分数
+        return None
+
+
+class TopScores:
+    """
+    前 k 名：大小为 k 的小顶堆，元素为 (分数, -序号, 名字)，堆顶是前 k 名中最低的一条。
+    序号按加入的先后递增，同分时先加入的排在前面；构造时给出的初始名单排在之后加入的同分成绩前面。
+    """
+
+    def __init__(self, k, initial=()):
+        """
+        参数:
+        k (int): 保留的名次数。
+        initial: 已有的前几名 [(名字, 分数), ...]，按分数从高到低。
+        """
+        self.k = k
+        self.heap = [(score, -i, name) for i, (name, score) in enumerate(initial)]
+        heapq.heapify(self.heap)
+        self.sequence = len(self.heap)
+
+    def push(self, name, score):
+        """加入一条成绩，挤掉前 k 名中最低的一条。"""
+        self.sequence += 1
+        entry = (score, -self.sequence, name)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self, k=None):
+        """返回前 k 名（缺省为全部）[(名字, 分数), ...]，按分数从高到低。"""
+        return [(name, score) for score, order, name in sorted(self.heap, reverse=True)[:k]]
+
+
+# 检查点中用来确认文件没有被改写的指纹长度：解析位置之前的这么多字节的 CRC32
+_fingerprint_size = 64
+
+
+def _fingerprint(data, offset):
+    """返回 data 中 offset 之前最后一段字节的 CRC32。"""
+    return zlib.crc32(data[max(0, offset - _fingerprint_size):offset])
+
+
+def scan_text(path, k=3, checkpoint=None, chunk_size=1 << 20, on_records=None, on_restart=None):
+    """
+    流式解析 "名字 分数" 格式的文本排行榜。
+
+    文件通过 mmap 映射，每次取 chunk_size 字节左右、在换行处截断的一块来解析，
+    整个文件不会同时以行列表的形式留在内存中。解析过程中只保留前 k 名（大小为 k 的小顶堆）
+    和每个名字的最高分，格式不对的行跳过并计数。
+    给出上一次返回的状态作为 checkpoint 时，从它记录的位置继续解析，只处理之后追加的行；
+    如果文件变短或解析位置之前的内容变了，说明文件被改写，从头重新解析。
+    只解析到最后一个换行为止：文件末尾没有换行的一行可能还没写完，留给下一次解析。
+
+    参数:
+    path (str): 文件路径。
+    k (int): 保留的前几名。
+    checkpoint (dict): 上一次返回的状态，None 表示从头解析。
+    chunk_size (int): 每块的大致字节数。
+    on_records: 每解析完一块时以 [(名字, 分数), ...] 调用的函数（只包含本次新解析的成绩）。
+    on_restart: 给出的 checkpoint 因文件被改写而作废、要从头解析时，在解析前调用的函数。
+
+    返回:
+    dict: 可以直接作为下一次 checkpoint 的状态，包括 'offset'（解析到的字节位置）、
+          'fingerprint'、'top'（[(名字, 分数), ...]，按分数从高到低，同分时先出现的在前）、
+          'maxima'（名字 -> 最高分）、'records'（有效成绩数）和 'bad'（格式不对的行数）。
+    """
+    state = {'offset': 0, 'fingerprint': 0, 'top': [], 'maxima': {}, 'records': 0, 'bad': 0}
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return state
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            if checkpoint is not None and checkpoint['offset'] <= size \
+                    and _fingerprint(data, checkpoint['offset']) == checkpoint['fingerprint']:
+                state = {
+                    'offset': checkpoint['offset'],
+                    'top': checkpoint['top'],
+                    'maxima': dict(checkpoint['maxima']),
+                    'records': checkpoint['records'],
+                    'bad': checkpoint['bad'],
+                }
+            elif checkpoint is not None and on_restart is not None:
+                on_restart()
+            maxima = state['maxima']
+            records = state['records']
+            bad = state['bad']
+            top = TopScores(k, state['top'])
+
+            offset = state['offset']
+            limit = data.rfind(b'\n', offset, size) + 1 or offset  # 最后一个换行之后
+            while offset < limit:
+                end = offset + chunk_size
+                if end < limit:
+                    # 在块内最后一个换行处截断；一行比整块还长时延伸到这一行结束
+                    cut = data.rfind(b'\n', offset, end)
+                    if cut < 0:
+                        cut = data.find(b'\n', end, limit)
+                    end = cut + 1
+                else:
+                    end = limit
+                parsed = []
+                for line in data[offset:end].split(b'\n'):
+                    if not line.strip():
+                        continue
+                    record = parse_line(line)
+                    if record is None:
+                        bad += 1
+                        continue
+                    name, score = record
+                    records += 1
+                    parsed.append(record)
+                    if maxima.get(name, score - 1) < score:
+                        maxima[name] = score
+                    top.push(name, score)
+                if on_records is not None and parsed:
+                    on_records(parsed)
+                offset = end
+
+            state['offset'] = offset
+            state['fingerprint'] = _fingerprint(data, offset)
+            state['top'] = top.items()
+            state['records'] = records
+            state['bad'] = bad
+        finally:
+            if size:
+                data.close()
+    return state
+
+
+def load_checkpoint(path):
+    """读取 scan_text() 的检查点文件，文件不存在或损坏时返回 None。"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_checkpoint(path, state):
+    """把 scan_text() 返回的状态写入检查点文件（先写临时文件再替换，不会留下写了一半的文件）。"""
+    temp = path + '.tmp'
+    with open(temp, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp, path)
+
+
+class ScoreIndex:
+    """
+    全部成绩分数的有序数组（64 位整数的 array，每个分数 8 字节），用于顺序统计查询。
+
+    名次、百分位和区间计数都是二分查找，为 O(log n)；插入是二分查找加一次内存移动，
+    数组连续存放，几万到几百万条成绩时移动的开销可以忽略。
+    """
+
+    def __init__(self, scores=()):
+        """
+        参数:
+        scores: 分数序列，不需要有序。
+        """
+        self.scores = array('q', sorted(scores))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def add(self, score):
+        """加入一个分数。"""
+        bisect.insort(self.scores, score)
+
+    def rank(self, score):
+        """
+        返回分数 score 的名次：严格高于它的成绩数加一（同分并列）。
+
+        参数:
+        score (int): 分数，不需要已经加入。
+
+        返回:
+        int: 名次，从 1 开始。
+        """
+        return len(self.scores) - bisect.bisect_right(self.scores, score) + 1
+
+    def percentile(self, score):
+        """
+        返回不高于 score 的成绩所占的百分比（0-100）；还没有成绩时返回 100。
+        """
+        if not self.scores:
+            return 100.0
+        return 100.0 * bisect.bisect_right(self.scores, score) / len(self.scores)
+
+    def between(self, low, high):
+        """返回分数在 [low, high] 之间的成绩数。"""
+        return max(0, bisect.bisect_right(self.scores, high) - bisect.bisect_left(self.scores, low))
+
+    def at(self, rank):
+        """返回第 rank 名（从 1 开始）的分数。"""
+        if not 1 <= rank <= len(self.scores):
+            raise IndexError("名次超出范围: %d" % rank)
+        return self.scores[len(self.scores) - rank]
+
+
+class Leaderboard:
+    """
+    保存全部历史成绩的排行榜。
+
+    每条成绩是 scores 表中的一行 (id, name, score, created, key, source)：key 是提交方给出的唯一编号
+    （可以为空），用来识别重复提交；source 是从文本排行榜导入的成绩所来自的文件（其他成绩为空）。
+    按分数从高到低和按 (名字, 分数) 各建一个索引：插入为 O(log n)，
+    前 K 名只需沿分数索引读 K 行，某个名字的最好成绩只需读一行。
+    同名玩家的多次成绩都会保留，不再互相覆盖。
+    """
+
+    def __init__(self, path='paihangbang.db', legacy='paihangbang.txt', compact_every=10000, fsync=None,
+                 index=True):
+        """
+        参数:
+        path (str): 数据库文件路径，':memory:' 表示只放在内存中。
+        legacy (str): 旧的文本排行榜，每次打开时导入上次之后追加的成绩；为 None 时不导入。
+        compact_every (int): 每提交这么多条成绩自动整理一次数据库，0 表示不自动整理。
+        fsync (str): fsync_policies 中的落盘策略，会把数据库切换为 WAL 日志；None 表示使用 SQLite 的默认设置。
+        index (bool): 是否在内存中维护 ScoreIndex，供名次和百分位查询使用；
+                      索引在第一次查询时才建立，打开数据库的开销不随记录数增长。
+        """
+        if fsync is not None and fsync not in fsync_policies:
+            raise ValueError("未知的落盘策略: %r" % (fsync,))
+        self.path = path
+        self.compact_every = compact_every
+        self.submitted = 0  # 上次整理以来提交的成绩数
+        self.indexed = index
+        self.index = None   # 全部分数的 ScoreIndex，第一次查询时建立
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA auto_vacuum = INCREMENTAL")  # 只对新建的数据库生效，删除后可逐步回收空闲页
+        if fsync is not None:
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.execute("PRAGMA synchronous = %s" % fsync_policies[fsync])
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+            CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, score DESC);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._add_column('scores', 'key', 'TEXT')
+        self._add_column('scores', 'source', 'TEXT')
+        self.db.execute("CREATE INDEX IF NOT EXISTS scores_by_source ON scores (source) WHERE source IS NOT NULL")
+        self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS scores_by_key ON scores (key) WHERE key IS NOT NULL")
+        if legacy is not None:
+            self.import_text(legacy)
+
+    def _add_column(self, table, column, declaration):
+        """给旧版本创建的表补上缺少的列。"""
+        if column not in [row[1] for row in self.db.execute("PRAGMA table_info(%s)" % table)]:
+            with self.db:
+                self.db.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, declaration))
+
+    def meta(self, key):
+        """读取一项元数据，没有时返回 None。"""
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        """写入一项元数据。"""
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def import_text(self, path):
+        """
+        用 scan_text() 分块导入 "名字 分数" 格式的文本排行榜，跳过格式不对的行；文件不存在时什么也不做。
+        解析状态作为检查点保存在 meta 表中，再次导入同一个文件时只处理之后追加的行。
+        导入的成绩记下来源文件；文件被改写、需要从头导入时，先删除以前从这个文件导入的成绩。
+
+        返回:
+        int: 本次导入的成绩数。
+        """
+        source = os.path.abspath(path)
+        key = 'checkpoint:' + source
+        checkpoint = self.meta(key)
+        if checkpoint is not None:
+            checkpoint = json.loads(checkpoint)
+        now = time.time()
+        imported = 0
+        removed = 0
+
+        def restart():
+            nonlocal removed
+            removed = self.db.execute("DELETE FROM scores WHERE source = ?", (source,)).rowcount
+
+        def insert(records):
+            nonlocal imported
+            self.db.executemany("INSERT INTO scores (name, score, created, source) VALUES (?, ?, ?, ?)",
+                                [(name, score, now, source) for name, score in records])
+            imported += len(records)
+            if self.index is not None and not removed:
+                for name, score in records:
+                    self.index.add(score)
+
+        # 删除、所有块和新的检查点在同一个事务中提交，中途出错时不会重复导入
+        with self.db:
+            state = scan_text(path, checkpoint=checkpoint, on_records=insert, on_restart=restart)
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(state)))
+        if removed and self.index is not None:
+            self.index = ScoreIndex(self.scores())
+        return imported
+
+    def submit(self, name, score, created=None):
+        """
+        提交一条成绩。
+
+        参数:
+        name (str): 玩家名字。
+        score (int): 得分。
+        created (float): 时间戳，缺省为当前时间。
+
+        返回:
+        int: 这条成绩的编号。
+        """
+        score = check_score(score)
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO scores (name, score, created) VALUES (?, ?, ?)",
+                (name, score, time.time() if created is None else created))
+        if self.index is not None:
+            self.index.add(score)
+        self._submitted(1)
+        return cursor.lastrowid
+
+    def submit_many(self, records, keys=None):
+        """
+        在一个事务中提交多条成绩，只落盘一次。
+
+        参数:
+        records (list): [(名字, 分数, 时间戳), ...]。
+        keys (list): 与 records 一一对应的唯一编号，None 表示都不带编号。
+        """
+        with self.db:
+            if keys is None:
+                self.db.executemany("INSERT INTO scores (name, score, created) VALUES (?, ?, ?)", records)
+            else:
+                self.db.executemany("INSERT INTO scores (name, score, created, key) VALUES (?, ?, ?, ?)",
+                                    [record + (key,) for record, key in zip(records, keys)])
+        if self.index is not None:
+            for name, score, created in records:
+                self.index.add(score)
+        self._submitted(len(records))
+
+    def _submitted(self, n):
+        """
+        记录提交的成绩数，够数时自动整理。成绩在这之前已经提交，
+        自动整理失败（例如数据库暂时被锁）不能让调用方以为写入失败而重试，下次提交时再整理。
+        """
+        self.submitted += n
+        if self.compact_every and self.submitted >= self.compact_every:
+            try:
+                self.compact()
+            except sqlite3.Error:
+                pass
+
+    def has_key(self, key):
+        """返回带有编号 key 的成绩是否已经保存。"""
+        return self.db.execute("SELECT 1 FROM scores WHERE key = ?", (key,)).fetchone() is not None
+
+    def top(self, k=3):
+        """
+        返回得分最高的 k 条成绩（同分时先提交的在前）。
+
+        返回:
+        list: [(名字, 分数), ...]，按分数从高到低。
+        """
+        return self.db.execute(
+            "SELECT name, score FROM scores ORDER BY score DESC, id LIMIT ?", (k,)).fetchall()
+
+    def leaders(self, k=3):
+        """返回标题界面显示的前 k 名，记录不足时用 default_leaders 补齐。"""
+        leaders = self.top(k)
+        return leaders + default_leaders[len(leaders):k]
+
+    def best(self, name):
+        """返回某个名字的最好成绩，没有记录时返回 None。"""
+        row = self.db.execute(
+            "SELECT score FROM scores WHERE name = ? ORDER BY score DESC LIMIT 1", (name,)).fetchone()
+        return row[0] if row else None
+
+    def history(self, name, limit=None):
+        """
+        返回某个名字的历史成绩。
+
+        参数:
+        name (str): 玩家名字。
+        limit (int): 最多返回的条数，缺省为全部。
+
+        返回:
+        list: [(分数, 时间戳), ...]，最近的在前。
+        """
+        return self.db.execute(
+            "SELECT score, created FROM scores WHERE name = ? ORDER BY id DESC LIMIT ?",
+            (name, -1 if limit is None else limit)).fetchall()
+
+    def scores(self):
+        """返回全部成绩的分数，从低到高（沿分数索引读取，不需要排序）。"""
+        return [row[0] for row in self.db.execute("SELECT score FROM scores ORDER BY score")]
+
+    def _scores_index(self):
+        """返回 ScoreIndex，第一次调用时从数据库读出全部分数建立；不维护索引时返回 None。"""
+        if self.index is None and self.indexed:
+            self.index = ScoreIndex(self.scores())
+        return self.index
+
+    def rank(self, score):
+        """返回分数 score 的名次：严格高于它的成绩数加一。有 ScoreIndex 时为 O(log n)。"""
+        index = self._scores_index()
+        if index is not None:
+            return index.rank(score)
+        return self.db.execute("SELECT COUNT(*) FROM scores WHERE score > ?", (int(score),)).fetchone()[0] + 1
+
+    def percentile(self, score):
+        """返回不高于 score 的成绩所占的百分比（0-100），见 ScoreIndex.percentile()。"""
+        index = self._scores_index()
+        if index is not None:
+            return index.percentile(score)
+        total = self.count()
+        if not total:
+            return 100.0
+        return 100.0 * self.db.execute(
+            "SELECT COUNT(*) FROM scores WHERE score <= ?", (int(score),)).fetchone()[0] / total
+
+    def between(self, low, high):
+        """返回分数在 [low, high] 之间的成绩数。"""
+        index = self._scores_index()
+        if index is not None:
+            return index.between(low, high)
+        return self.db.execute(
+            "SELECT COUNT(*) FROM scores WHERE score BETWEEN ? AND ?", (int(low), int(high))).fetchone()[0]
+
+    def count(self):
+        """返回成绩总数。"""
+        return self.db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def compact(self, history_limit=None, full=False):
+        """
+        整理数据库：可选地只保留每个名字最近的 history_limit 条成绩（最好成绩总是保留），
+        然后回收空闲页并更新查询规划用的统计。自动整理只做这些开销很小的步骤；
+        full 为 True 时再重写整个数据库文件（VACUUM），耗时与记录数成正比。
+
+        参数:
+        history_limit (int): 每个名字保留的历史条数，None 表示不删除任何成绩。
+        full (bool): 是否重写整个数据库文件。
+        """
+        if history_limit is not None:
+            with self.db:
+                self.db.execute("""
+                    DELETE FROM scores WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id,
+                                   ROW_NUMBER() OVER (PARTITION BY name ORDER BY id DESC) AS recent,
+                                   ROW_NUMBER() OVER (PARTITION BY name ORDER BY score DESC, id) AS rank
+                            FROM scores
+                        ) WHERE recent > ? AND rank > 1
+                    )""", (history_limit,))
+            if self.index is not None:
+                self.index = ScoreIndex(self.scores())
+        self.db.execute("PRAGMA incremental_vacuum")
+        self.db.execute("PRAGMA optimize")
+        if full:
+            self.db.execute("VACUUM")
+        self.submitted = 0
+
+    def close(self):
+        """关闭数据库。"""
+        self.db.close()
+
+
+class ScoreWriter:
+    """
+    在后台线程中保存成绩的排行榜。
+
+    submit() 只把成绩并入内存中的前 K 名（TopScores）和 ScoreIndex，再放入有界队列，立即返回；
+    构造时只等后台线程读出前 K 名，全部分数的 ScoreIndex 之后在后台线程中建立，建好之前名次查询返回 None；
+    后台线程从队列中一次取出尽量多的成绩，在一个事务中写入 Leaderboard；写入失败的成绩留在后台线程中，
+    每隔 retry_interval 秒与之后的成绩一起重试，出错期间 error 为最近一次的异常，供界面提示。
+    SQLite 连接只能在创建它的线程中使用，所以数据库在后台线程中打开，主线程从不直接访问。
+    """
+
+    def __init__(self, path='paihangbang.db', legacy='paihangbang.txt', k=3, fsync='batch',
+                 batch_size=64, queue_size=1024, retry_interval=1.0):
+        """
+        参数:
+        path (str): 数据库文件路径。
+        legacy (str): 旧的文本排行榜，见 Leaderboard。
+        k (int): 内存中保留的前几名。
+        fsync (str): fsync_policies 中的落盘策略。
+        batch_size (int): 一个事务最多写入的成绩数。
+        queue_size (int): 队列容量，队列满时 submit() 会等待后台线程赶上。
+        retry_interval (float): 写入失败后的重试间隔（秒）。
+        """
+        if fsync not in fsync_policies:
+            raise ValueError("未知的落盘策略: %r" % (fsync,))
+        self.k = k
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.queue = queue.Queue(queue_size)
+        self.top = None      # 内存中的前 K 名（TopScores）
+        self.index = None    # 全部分数的 ScoreIndex，只在主线程中使用，建好之前为 None
+        self._loaded = None  # 后台线程建好的 ScoreIndex，由主线程取走
+        self._early = []     # 索引建好之前提交的分数，取走索引时补进去
+        self.written = 0     # 已写入数据库的成绩数
+        self.batches = 0     # 已提交的事务数
+        self.unsaved = 0     # 写入失败、等待重试的成绩数
+        self.error = None    # 后台线程中最近一次的异常，之后写入成功时清空
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(path, legacy, fsync, ready),
+                                       name='paihangbang', daemon=True)
+        self.thread.start()
+        ready.wait()  # 只等后台线程读出现有的前 K 名
+        if self.error is not None:
+            raise self.error
+
+    def _run(self, path, legacy, fsync, ready):
+        """
+        后台线程：打开数据库，读出前 K 名后让构造函数返回，再读出全部分数建立 ScoreIndex，
+        然后批量写入队列中的成绩，直到收到 None。
+        """
+        try:
+            board = Leaderboard(path, legacy=legacy, fsync=fsync, index=False)
+            self.top = TopScores(self.k, board.top(self.k))
+        except Exception as error:
+            self.error = error
+            ready.set()
+            return
+        ready.set()
+        # 建索引时还没有写入任何排队的成绩，它们由主线程在取走索引时补上
+        try:
+            self._loaded = ScoreIndex(board.scores())
+        except Exception as error:
+            self.error = error
+
+        failed = []  # 写入失败、等待重试的成绩
+        running = True
+        while running:
+            records = []
+            try:
+                # 有等待重试的成绩时最多等 retry_interval 秒
+                records.append(self.queue.get(timeout=self.retry_interval if failed else None))
+                while len(records) < self.batch_size and records[-1] is not None:
+                    records.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            taken = len(records)
+            if records and records[-1] is None:
+                running = False
+                records.pop()
+            batch = failed + records
+            if batch:
+                try:
+                    board.submit_many(batch)
+                except Exception as error:
+                    self.error = error
+                    failed = batch  # 事务已回滚，整批留到下次重试
+                else:
+                    self.written += len(batch)
+                    self.batches += 1
+                    self.error = None
+                    failed = []
+                self.unsaved = len(failed)
+            for i in range(taken):
+                self.queue.task_done()
+        board.close()
+
+    def submit(self, name, score, created=None):
+        """
+        提交一条成绩：立即并入前 K 名，数据库写入在后台进行。
+
+        参数:
+        name (str): 玩家名字。
+        score (int): 得分。
+        created (float): 时间戳，缺省为当前时间。
+        """
+        score = check_score(score)
+        self.top.push(name, score)
+        if self._scores_index() is not None:
+            self.index.add(score)
+        else:
+            self._early.append(score)
+        self.queue.put((name, score, time.time() if created is None else created))
+
+    def _scores_index(self):
+        """返回 ScoreIndex；后台线程刚建好时取走它并补上之前提交的分数，还没建好时返回 None。"""
+        if self.index is None and self._loaded is not None:
+            index = self._loaded
+            for score in self._early:
+                index.add(score)
+            self._early = []
+            self.index = index
+        return self.index
+
+    def rank(self, score):
+        """返回分数 score 在全部成绩中的名次，见 ScoreIndex.rank()；索引还没建好时返回 None。"""
+        index = self._scores_index()
+        return None if index is None else index.rank(score)
+
+    def percentile(self, score):
+        """返回不高于 score 的成绩所占的百分比，见 ScoreIndex.percentile()；索引还没建好时返回 None。"""
+        index = self._scores_index()
+        return None if index is None else index.percentile(score)
+
+    def between(self, low, high):
+        """返回分数在 [low, high] 之间的成绩数；索引还没建好时返回 None。"""
+        index = self._scores_index()
+        return None if index is None else index.between(low, high)
+
+    def count(self):
+        """返回成绩总数（包括还没有写入数据库的）；索引还没建好时返回 None。"""
+        index = self._scores_index()
+        return None if index is None else len(index)
+
+    def leaders(self, k=None):
+        """
+        返回内存中的前 k 名（不超过构造时的 k），记录不足时用 default_leaders 补齐。
+
+        返回:
+        list: [(名字, 分数), ...]，按分数从高到低。
+        """
+        k = self.k if k is None else min(k, self.k)
+        leaders = self.top.items(k)
+        return leaders + default_leaders[len(leaders):k]
+
+    def flush(self):
+        """等待队列中的成绩全部交给后台线程；还有成绩写入失败、等待重试时抛出最近一次的异常。"""
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """
+        写完队列中剩余的成绩（失败的成绩再重试一次）后结束后台线程。
+        不抛出后台线程的异常，以免打断退出流程；调用方可以查看 error 和 unsaved。
+
+        返回:
+        int: 没能保存的成绩数。
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        return self.unsaved
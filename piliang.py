@@ -0,0 +1,326 @@
+# 向量化的批量模拟器：用 NumPy 数组同时推进成千上万局游戏，用于调试机器人参数和压力测试
+# 规则（移动、SRS 旋转、Hold、重力、锁定延迟、消行、得分和升级）与 yinqing.GameState 完全相同：
+# 同样的种子和同样的动作序列，每一局都得到与 GameState.step() 逐步执行相同的结果
+from random import Random
+
+import numpy as np
+
+from fangkuai import tetrimino
+from qipan import piece_masks
+from yinqing import LEFT, RIGHT, ROTATE_R, ROTATE_L, HARD_DROP, HOLD, G, gravity_table, line_scores, lock_delay
+
+# 方块左上角的 x 坐标加上 _offset 后作为掩码表的下标，踢墙后的 x 也不会小于 -_offset
+_offset = 4
+
+# 按 (宽度, 数据类型) 缓存的查找表
+_table_cache = {}
+
+
+def _tables(width, dtype):
+    """
+    把方块的形状、行掩码和踢墙表整理成可以用数组下标批量查找的形式。
+
+    返回:
+    tuple: (masks, valid, cells, kicks)
+        masks[mino, r, x + _offset, i]: 方块第 i 行（相对左上角）的行掩码；
+        valid[mino, r, x + _offset]: 方块在该列是否完全位于左右边界之内；
+        cells[mino, r, k]: 第 k 个格子的 (dx, dy)；
+        kicks[mino, r, d, k]: 第 k 个踢墙位移 (ox, oy)，d 为 0 表示向右旋转，1 表示向左旋转。
+        mino 从 1 开始，下标 0 不使用。
+    """
+    key = (width, np.dtype(dtype).str)
+    tables = _table_cache.get(key)
+    if tables is not None:
+        return tables
+
+    columns = width + 2 * _offset
+    masks = np.zeros((8, 4, columns, 4), dtype=dtype)
+    valid = np.zeros((8, 4, columns), dtype=bool)
+    cells = np.zeros((8, 4, 4, 2), dtype=np.int64)
+    kicks = np.zeros((8, 4, 2, 5, 2), dtype=np.int64)
+
+    for mino, rotations in enumerate(piece_masks(width), 1):
+        for r, per_x in enumerate(rotations):
+            for x, rows in per_x.items():
+                valid[mino, r, x + _offset] = True
+                for i, mask in rows:
+                    masks[mino, r, x + _offset, i] = mask
+            cells[mino, r] = tetrimino.shapes[mino - 1][r].cells
+            for d, direction in enumerate((1, -1)):
+                offsets = tetrimino.kicks[mino - 1][(r, (r + direction) % 4)]
+                # O 方块只有一个位移，重复它补齐 5 个，重复检测不会改变结果
+                offsets = offsets + (offsets[0],) * (5 - len(offsets))
+                kicks[mino, r, d] = offsets
+
+    tables = (masks, valid, cells, kicks)
+    _table_cache[key] = tables
+    return tables
+
+
+class BatchGame:
+    """
+    同时进行 n 局游戏的批量引擎。
+
+    所有状态都是长度为 n 的数组（第 k 个元素属于第 k 局）：游戏板保存为 (n, rows) 的行位掩码
+    bits 和 (n, rows, width) 的 uint8 颜色数组 colors，方块位置、得分、等级等与 GameState
+    的同名属性一一对应。step() 对所有游戏同时执行动作并推进一个 tick，
+    碰撞检测、下落、锁定和消行都是对整批数组的运算；只有抽取新方块时逐局使用各自的随机数生成器，
+    保证方块序列与同样种子的 GameState 相同。
+    """
+
+    def __init__(self, n, seeds=None, width=10, height=20):
+        """
+        参数:
+        n (int): 同时进行的游戏局数。
+        seeds: 长度为 n 的随机数种子序列，缺省为 0 到 n - 1。
+        width (int): 游戏板宽度。
+        height (int): 游戏板可见高度，另有一行隐藏的出生行。
+        """
+        self.n = n
+        self.width = width
+        self.height = height
+        self.rows = height + 1
+        self.spawn_x = width // 2 - 2
+        self.dtype = np.uint16 if width <= 16 else np.uint64
+        self.full = self.dtype((1 << width) - 1)  # 满行的掩码
+        self.masks, self.valid, self.cells, self.kicks = _tables(width, self.dtype)
+        self.gravity_table = np.array(gravity_table, dtype=np.int64)
+        self.line_scores = np.array(line_scores, dtype=np.int64)
+
+        self.bits = np.zeros((n, self.rows), dtype=self.dtype)
+        self.colors = np.zeros((n, self.rows, width), dtype=np.uint8)
+        for name in ('score', 'level', 'goal', 'lines', 'pieces', 'gravity_acc', 'lock_ticks',
+                     'dx', 'dy', 'rotation', 'mino', 'next_mino', 'hold_mino'):
+            setattr(self, name, np.zeros(n, dtype=np.int64))
+        self.hold_used = np.zeros(n, dtype=bool)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        if seeds is None:
+            seeds = range(n)
+        self.rngs = [Random(seed) for seed in seeds]
+        self.reset()
+
+    def reset(self, games=None):
+        """
+        把选中的游戏重置为新的一局，随机数生成器接着使用（与 GameState.reset() 相同）。
+
+        参数:
+        games: 要重置的游戏的布尔掩码或下标数组，缺省为全部。
+        """
+        idx = np.arange(self.n) if games is None else self._indices(games)
+        self.bits[idx] = 0
+        self.colors[idx] = 0
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.goal[idx] = 5
+        self.lines[idx] = 0
+        self.pieces[idx] = 0
+        self.gravity_acc[idx] = 0
+        self.lock_ticks[idx] = 0
+        self.dx[idx] = self.spawn_x
+        self.dy[idx] = 0
+        self.rotation[idx] = 0
+        self.hold_mino[idx] = -1
+        self.hold_used[idx] = False
+        self.game_over[idx] = False
+        for k in idx:
+            self.mino[k] = self.rngs[k].randint(1, 7)
+            self.next_mino[k] = self.rngs[k].randint(1, 7)
+
+    def matrix(self, k):
+        """返回第 k 局的颜色数组，排列方式与 GameState.matrix 相同（matrix[x][y]）。"""
+        return self.colors[k].T
+
+    def step(self, actions):
+        """
+        每局执行一个动作，然后推进一个 tick（硬降自带锁定，不再额外下落），与 GameState.step() 相同。
+
+        参数:
+        actions: 长度为 n 的动作编号数组（yinqing.ACTIONS）。
+
+        返回:
+        numpy.ndarray: 每局本次消除的行数。
+        """
+        actions = np.asarray(actions)
+        alive = ~self.game_over
+        erased = np.zeros(self.n, dtype=np.int64)
+
+        self._move(np.flatnonzero(alive & (actions == LEFT)), -1)
+        self._move(np.flatnonzero(alive & (actions == RIGHT)), 1)
+        self._rotate(np.flatnonzero(alive & (actions == ROTATE_R)), 1)
+        self._rotate(np.flatnonzero(alive & (actions == ROTATE_L)), -1)
+        self._hold(np.flatnonzero(alive & (actions == HOLD) & ~self.hold_used))
+
+        drop = np.flatnonzero(alive & (actions == HARD_DROP))
+        if drop.size:
+            self.dy[drop] += self._drop_distance(drop)
+            self._lock(drop, erased)
+
+        self._tick(np.flatnonzero(alive & (actions != HARD_DROP)), erased)
+        return erased
+
+    # 批量规则
+    def _indices(self, games):
+        """把布尔掩码或下标序列转换为下标数组。"""
+        games = np.asarray(games)
+        return np.flatnonzero(games) if games.dtype == bool else games
+
+    def _collides(self, idx, x, y, mino, r):
+        """
+        批量碰撞检测：第 idx[k] 局的方块 mino[k] 以旋转状态 r[k] 放在 (x[k], y[k]) 时
+        是否越界或与已有方块重叠。
+
+        返回:
+        numpy.ndarray: 与 idx 等长的布尔数组。
+        """
+        column = x + _offset
+        inside = (column >= 0) & (column < self.valid.shape[2])
+        column = np.clip(column, 0, self.valid.shape[2] - 1)
+        masks = self.masks[mino, r, column]            # (k, 4)
+        rows = y[:, None] + np.arange(4)               # (k, 4)
+        in_range = (rows >= 0) & (rows < self.rows)
+        board = self.bits[idx[:, None], np.clip(rows, 0, self.rows - 1)]
+        hit = ((board & masks) != 0) & in_range
+        outside = (masks != 0) & ~in_range
+        return ~(inside & self.valid[mino, r, column]) | hit.any(axis=1) | outside.any(axis=1)
+
+    def _move(self, idx, step):
+        """左右移动，受阻的游戏不动。"""
+        if idx.size:
+            blocked = self._collides(idx, self.dx[idx] + step, self.dy[idx], self.mino[idx], self.rotation[idx])
+            self.dx[idx[~blocked]] += step
+
+    def _rotate(self, idx, direction):
+        """按 SRS 踢墙表旋转：逐个位移对所有尚未成功的游戏同时检测。"""
+        if not idx.size:
+            return
+        d = 0 if direction == 1 else 1
+        target = (self.rotation[idx] + direction) % 4
+        pending = np.ones(idx.size, dtype=bool)
+        for k in range(self.kicks.shape[3]):
+            sub = np.flatnonzero(pending)
+            if not sub.size:
+                break
+            games = idx[sub]
+            offsets = self.kicks[self.mino[games], self.rotation[games], d, k]  # (m, 2)
+            x = self.dx[games] + offsets[:, 0]
+            y = self.dy[games] + offsets[:, 1]
+            ok = ~self._collides(games, x, y, self.mino[games], target[sub])
+            won = games[ok]
+            self.dx[won] = x[ok]
+            self.dy[won] = y[ok]
+            self.rotation[won] = target[sub][ok]
+            pending[sub[ok]] = False
+
+    def _hold(self, idx):
+        """Hold：第一次 Hold 换上下一个方块，之后与持有的方块交换。"""
+        if not idx.size:
+            return
+        first = idx[self.hold_mino[idx] == -1]
+        swap = idx[self.hold_mino[idx] != -1]
+        self.hold_mino[first] = self.mino[first]
+        self.mino[first] = self.next_mino[first]
+        self._draw(first)
+        self.hold_mino[swap], self.mino[swap] = self.mino[swap], self.hold_mino[swap].copy()
+        self.dx[idx] = self.spawn_x
+        self.dy[idx] = 0
+        self.rotation[idx] = 0
+        self.hold_used[idx] = True
+
+    def _draw(self, idx):
+        """逐局用各自的随机数生成器抽取下一个方块。"""
+        for k in idx:
+            self.next_mino[k] = self.rngs[k].randint(1, 7)
+
+    def _drop_distance(self, idx):
+        """批量计算方块直接落下能下降的行数：所有仍能下降的游戏同时下移一行，直到全部触底。"""
+        distance = np.zeros(idx.size, dtype=np.int64)
+        falling = np.ones(idx.size, dtype=bool)
+        while True:
+            sub = np.flatnonzero(falling)
+            if not sub.size:
+                return distance
+            games = idx[sub]
+            blocked = self._collides(games, self.dx[games], self.dy[games] + distance[sub] + 1,
+                                     self.mino[games], self.rotation[games])
+            distance[sub[~blocked]] += 1
+            falling[sub[blocked]] = False
+
+    def _tick(self, idx, erased):
+        """推进 1/60 秒：累积重力、下落，触底经过 lock_delay 个 tick 后锁定。"""
+        if not idx.size:
+            return
+        level = np.minimum(self.level[idx], self.gravity_table.size) - 1
+        acc = self.gravity_acc[idx] + self.gravity_table[level]
+        rows = acc // G
+        acc -= rows * G
+        gap = self._drop_distance(idx)  # 到投影位置的距离
+        fall = np.minimum(rows, gap)
+        self.dy[idx] += fall
+        self.lock_ticks[idx[fall > 0]] = 0  # 下降到新的一行，锁定计时重新开始
+
+        grounded = fall == gap
+        acc[grounded] = 0
+        self.gravity_acc[idx] = acc
+        landed = idx[grounded]
+        self.lock_ticks[landed] += 1
+        self._lock(landed[self.lock_ticks[landed] >= lock_delay], erased)
+
+    def _lock(self, idx, erased):
+        """锁定方块、消除满行，再生成下一个方块（放不下则游戏结束），并结算得分与升级。"""
+        if not idx.size:
+            return
+        self.lock_ticks[idx] = 0
+        self.gravity_acc[idx] = 0
+        self.score[idx] += 10 * self.level[idx]
+        self.pieces[idx] += 1
+
+        mino = self.mino[idx]
+        r = self.rotation[idx]
+        x = self.dx[idx]
+        y = self.dy[idx]
+
+        # 写入行掩码（同一局的几行互不相同，但用 at 保证补齐的空行不会覆盖结果）和颜色
+        masks = self.masks[mino, r, x + _offset]
+        used = masks != 0
+        games = np.broadcast_to(idx[:, None], masks.shape)[used]
+        rows = (y[:, None] + np.arange(4))[used]
+        np.bitwise_or.at(self.bits, (games, rows), masks[used])
+        cells = self.cells[mino, r]
+        self.colors[idx[:, None], y[:, None] + cells[:, :, 1], x[:, None] + cells[:, :, 0]] = mino[:, None]
+
+        # 消行：满行排到最前面、其余行保持原顺序，再把最前面的行清空
+        full = self.bits[idx] == self.full
+        count = full.sum(axis=1)
+        clearing = count > 0
+        if clearing.any():
+            games = idx[clearing]
+            order = np.argsort(~full[clearing], axis=1, kind='stable')
+            empty = np.arange(self.rows) < count[clearing][:, None]
+            bits = np.take_along_axis(self.bits[games], order, axis=1)
+            bits[empty] = 0
+            self.bits[games] = bits
+            colors = np.take_along_axis(self.colors[games], order[:, :, None], axis=1)
+            colors[empty] = 0
+            self.colors[games] = colors
+
+        # 消行之后再判断下一个方块能否放置，与 GameState._lock() 的顺序相同
+        zeros = np.zeros(idx.size, dtype=np.int64)
+        stackable = ~self._collides(idx, zeros + self.spawn_x, zeros, self.next_mino[idx], zeros)
+        spawned = idx[stackable]
+        self.mino[spawned] = self.next_mino[spawned]
+        self._draw(spawned)
+        self.dx[spawned] = self.spawn_x
+        self.dy[spawned] = 0
+        self.rotation[spawned] = 0
+        self.hold_used[spawned] = False
+        self.game_over[idx[~stackable]] = True
+
+        level = self.level[idx]
+        self.score[idx] += self.line_scores[count] * level
+        self.lines[idx] += count
+        self.goal[idx] -= count
+        up = idx[(self.goal[idx] < 1) & (level < 15)]
+        self.level[up] += 1
+        self.goal[up] += self.level[up] * 5
+        erased[idx] = count
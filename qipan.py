@@ -0,0 +1,788 @@
+# 游戏板的几种存储方式，供 yinqing.GameState 选用
+# 所有游戏板都提供同样的接口：collides / kick / lock / clear_lines / drop_distance / copy，
+# 以及撤销用的 unlock / restore_lines / save_stats / load_stats 和搜索用的 make / unmake，
+# 并保留 matrix[x][y] 颜色数组给界面层绘制，tops[x] 记录每列最高方块所在的行
+# （列高即 rows - tops[x]）。此外还随锁定和消行增量维护堆叠的统计值：
+# fills[x] 每列的方块数，holes 空洞数，bumpiness 相邻列高差之和，max_height 最大列高，
+# 锁定时只更新方块所在的几列，消行时为 O(width)，读取都是 O(1)；
+# hash 为占用格子的 Zobrist 散列值，锁定时异或新格子，消行时只重算下移的行。
+# 与存储方式无关的方法都在基类 Board 中实现，各个子类只负责格子的存储和读写
+from collections import OrderedDict
+from fangkuai import tetrimino
+from sanlie import cell_keys
+
+
+class Board:
+    """
+    各种游戏板共用的部分：踢墙、下降距离，以及撤销用的统计值快照和搜索用的 make / unmake。
+    子类只实现与存储方式有关的 clear / copy / collides / lock / clear_lines / unlock / restore_lines，
+    并在 lock() 和 clear_lines() 中用 _place() / _lower_tops() 增量维护列高和统计值。
+    """
+
+    def kick(self, x, y, mino, r, target):
+        """
+        按 SRS 踢墙表找出方块从状态 r 旋转到 target 时可用的位移：逐个用 collides() 检测候选位置。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 当前旋转状态（0-3）。
+        target (int): 旋转后的状态（0-3）。
+
+        返回:
+        tuple: 第一个不冲突的位移 (ox, oy)；全部冲突时返回 None。
+        """
+        for ox, oy in tetrimino.kicks[mino - 1][(r, target)]:
+            if not self.collides(x + ox, y + oy, mino, target):
+                return ox, oy
+        return None
+
+    def drop_distance(self, x, y, mino, r):
+        """
+        返回方块从 (x, y) 直接落下能下降的行数。
+        方块完全位于各列最高方块之上时，下降距离只取决于每列最低的格子与列高，
+        只需检查至多 4 列；方块被悬空的方块压住时退回逐行检测。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 旋转状态（0-3）。
+
+        返回:
+        int: 可下降的行数。
+        """
+        tops = self.tops
+        distance = self.rows
+        for cx, cy in tetrimino.shapes[mino - 1][r].bottoms:
+            gap = tops[x + cx] - (y + cy) - 1
+            if gap < 0:
+                distance = -1
+                break
+            if gap < distance:
+                distance = gap
+        if distance >= 0:
+            return distance
+
+        distance = 0
+        while not self.collides(x, y + distance + 1, mino, r):
+            distance += 1
+        return distance
+
+    def save_stats(self, first=0, last=None):
+        """
+        返回列高、统计值和散列值的快照，供 load_stats() 还原。
+        锁定一个方块只会改动它所在的几列，撤销锁定时只需保存这几列。
+
+        参数:
+        first (int): 保存列高和方块数的第一列。
+        last (int): 保存到此列之前；为 None 时保存到最后一列。
+        """
+        return (first, self.tops[first:last], self.fills[first:last],
+                self.holes, self.bumpiness, self.max_height, self.hash)
+
+    def load_stats(self, stats):
+        """原地还原 save_stats() 保存的快照，没有保存的列保持不变。"""
+        first, tops, fills, self.holes, self.bumpiness, self.max_height, self.hash = stats
+        self.tops[first:first + len(tops)] = tops
+        self.fills[first:first + len(fills)] = fills
+
+    def make(self, x, y, mino, r):
+        """
+        锁定方块并消行，返回 (消除的行数, 撤销记录)，撤销记录交给 unmake() 还原。
+        搜索时在同一块游戏板上逐个尝试落点，不必复制整个游戏板。没有消行时只有方块所在的
+        几列列高和方块数改变，撤销记录只保存这几列；消行改动的其余各列由 restore_lines() 推回。
+        """
+        bbox = tetrimino.shapes[mino - 1][r].bbox
+        stats = self.save_stats(x + bbox[0], x + bbox[2] + 1)
+        saved = []  # 被消除的行及其颜色
+        cleared = self.clear_lines(self.lock(x, y, mino, r), saved)
+        return len(cleared), (x, y, mino, r, saved, stats)
+
+    def unmake(self, move):
+        """撤销 make()：先放回消除的行，再移除方块，最后还原方块所在几列的列高、统计值和散列值。"""
+        x, y, mino, r, saved, stats = move
+        if saved:
+            self.restore_lines(saved)
+        self.unlock(x, y, mino, r)
+        self.load_stats(stats)
+
+
+class ListBoard(Board):
+    """
+    原始的游戏板：matrix[x][y] 为嵌套列表，0 为空，其他数字为方块颜色。
+    碰撞检测逐个检查方块的 4 个格子；counts[y] 记录每行已占用的格数，用于找出满行。
+    """
+
+    def __init__(self, width=10, rows=21):
+        """
+        参数:
+        width (int): 游戏板宽度。
+        rows (int): 游戏板总行数（含隐藏的出生行）。
+        """
+        self.width = width
+        self.rows = rows
+        self.keys = cell_keys(width, rows)  # 每个格子的 Zobrist 键
+        self.clear()
+
+    def clear(self):
+        """清空游戏板。"""
+        self.matrix = [[0 for y in range(self.rows)] for x in range(self.width)]
+        self.counts = [0] * self.rows
+        _reset_stats(self)
+
+    def copy(self):
+        """返回一个内容相同、互不影响的游戏板。"""
+        other = ListBoard.__new__(ListBoard)
+        other.width = self.width
+        other.rows = self.rows
+        other.keys = self.keys
+        other.matrix = [column[:] for column in self.matrix]
+        other.counts = self.counts[:]
+        _copy_stats(self, other)
+        return other
+
+    def collides(self, x, y, mino, r):
+        """
+        判断方块放在 (x, y) 处是否越界或与已有方块重叠。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 旋转状态（0-3）。
+
+        返回:
+        bool: 有冲突则返回 True。
+        """
+        matrix = self.matrix
+
+        for cx, cy in tetrimino.shapes[mino - 1][r].cells:
+            if (x + cx) < 0 or (x + cx) >= self.width or (y + cy) < 0 or (y + cy) >= self.rows:
+                return True  # 超出边界
+            elif matrix[x + cx][y + cy] != 0:
+                return True  # 已经有其他方块
+
+        return False
+
+    def lock(self, x, y, mino, r):
+        """
+        把方块写入游戏板。
+
+        返回:
+        range: 方块占用的行，只有这些行可能因此变满。
+        """
+        shape = tetrimino.shapes[mino - 1][r]
+        for cx, cy in shape.cells:
+            self.matrix[x + cx][y + cy] = mino
+            self.counts[y + cy] += 1
+        _place(self, x, y, shape)
+        return range(y + shape.bbox[1], y + shape.bbox[3] + 1)
+
+    def clear_lines(self, rows=None, saved=None):
+        """
+        消除满行，并在一次遍历中把其余行稳定地向下压紧，顶部补空行。
+
+        参数:
+        rows: 需要检查的行，通常是 lock() 的返回值；为 None 时检查全部行。
+        saved (list): 如果给出，把被消除的行的 (y, 各列颜色) 追加进去，供 restore_lines() 撤销。
+
+        返回:
+        list: 被消除的行号（从上到下）。
+        """
+        cleared = _full_rows(self.counts, self.width, self.rows, rows)
+        if cleared:
+            if saved is not None:
+                _save_rows(self, cleared, saved)
+            old = _rows_hash(self, cleared[-1])
+            _compact(self.counts, cleared, 0)
+            for column in self.matrix:
+                _compact(column, cleared, 0)
+            _lower_tops(self, cleared, old)
+        return cleared
+
+    def unlock(self, x, y, mino, r):
+        """从游戏板上移除 lock() 写入的方块（用于撤销），方块所在几列的列高和统计值由 load_stats() 还原。"""
+        for cx, cy in tetrimino.shapes[mino - 1][r].cells:
+            self.matrix[x + cx][y + cy] = 0
+            self.counts[y + cy] -= 1
+
+    def restore_lines(self, saved):
+        """把 clear_lines() 消除并记录在 saved 中的行放回原处（用于撤销），列高和方块数回到消行前。"""
+        cleared = [y for y, colors in saved]
+        _expand(self.counts, cleared, [self.width] * len(saved))
+        for x, column in enumerate(self.matrix):
+            _expand(column, cleared, [colors[x] for y, colors in saved])
+        _raise_tops(self, cleared)
+
+
+def _reset_stats(board):
+    """空游戏板的列高和统计值。"""
+    board.tops = [board.rows] * board.width  # 空列的最高行记为 rows
+    board.fills = [0] * board.width
+    board.holes = 0
+    board.bumpiness = 0
+    board.max_height = 0
+    board.hash = 0
+
+
+def _copy_stats(board, other):
+    """把列高和统计值复制到 other。"""
+    other.tops = board.tops[:]
+    other.fills = board.fills[:]
+    other.holes = board.holes
+    other.bumpiness = board.bumpiness
+    other.max_height = board.max_height
+    other.hash = board.hash
+
+
+def _place(board, x, y, shape):
+    """
+    锁定方块后，只针对方块所在的几列更新列高、方块数、空洞数、
+    表面起伏（包括与两侧相邻列的高差）、最大高度和散列值。
+    """
+    tops = board.tops
+    fills = board.fills
+    rows = board.rows
+    edges = range(max(x + shape.bbox[0] - 1, 0), min(x + shape.bbox[2] + 1, board.width - 1))
+
+    holes = 0
+    bumpiness = 0
+    for cx, cy in shape.bottoms:
+        holes -= rows - tops[x + cx] - fills[x + cx]
+    for e in edges:
+        bumpiness -= abs(tops[e] - tops[e + 1])
+
+    keys = board.keys
+    width = board.width
+    digest = board.hash
+    for cx, cy in shape.cells:
+        fills[x + cx] += 1
+        if y + cy < tops[x + cx]:
+            tops[x + cx] = y + cy
+        digest ^= keys[(y + cy) * width + x + cx]
+    board.hash = digest
+
+    highest = rows
+    for cx, cy in shape.bottoms:
+        holes += rows - tops[x + cx] - fills[x + cx]
+        highest = min(highest, tops[x + cx])
+    for e in edges:
+        bumpiness += abs(tops[e] - tops[e + 1])
+
+    board.holes += holes
+    board.bumpiness += bumpiness
+    board.max_height = max(board.max_height, rows - highest)
+
+
+def _rows_hash(board, last):
+    """返回从最高的方块到第 last 行之间所有占用格子的键的异或（更高的行都是空行）。"""
+    keys = board.keys
+    width = board.width
+    digest = 0
+    for x, column in enumerate(board.matrix):
+        for y in range(min(board.tops), last + 1):
+            if column[y] != 0:
+                digest ^= keys[y * width + x]
+    return digest
+
+
+def _lower_tops(board, cleared, old):
+    """
+    消行后更新列高和统计值。被消除的行是满行，每列的最高方块都不低于最上面的被消除行：
+    高于它的列整体下移 len(cleared) 行；最高方块恰好被消除的列，从下移后的位置向下查找。
+    最低的被消除行以下没有变化，散列值只需换掉以上各行的部分，old 为消行前这部分的散列值。
+    """
+    tops = board.tops
+    fills = board.fills
+    matrix = board.matrix
+    rows = board.rows
+    shift = len(cleared)
+    first = cleared[0]
+    for x in range(board.width):
+        fills[x] -= shift
+        top = tops[x] + shift
+        if tops[x] == first:
+            column = matrix[x]
+            while top < rows and column[top] == 0:
+                top += 1
+        tops[x] = top
+    board.hash ^= old ^ _rows_hash(board, cleared[-1])
+    _recount(board)
+
+
+def _raise_tops(board, cleared):
+    """
+    _lower_tops() 的逆操作（只还原列高和方块数，统计值和散列值由 load_stats() 还原）：
+    被消除的行是满行，每列方块数加回 len(cleared)；消行前每列最高方块不低于最上面的被消除行，
+    高于它的列整体上移回去，其余列的最高方块就在这一行。
+    """
+    tops = board.tops
+    fills = board.fills
+    shift = len(cleared)
+    first = cleared[0]
+    for x in range(board.width):
+        fills[x] += shift
+        tops[x] = min(tops[x] - shift, first)
+
+
+def _recount(board):
+    """按列高和每列方块数重新计算空洞数、表面起伏和最大高度，O(width)。"""
+    tops = board.tops
+    rows = board.rows
+    board.holes = sum(rows - top - fill for top, fill in zip(tops, board.fills))
+    board.bumpiness = sum(abs(tops[x] - tops[x + 1]) for x in range(board.width - 1))
+    board.max_height = rows - min(tops)
+
+
+def _full_rows(values, full, row_count, rows):
+    """返回 rows 中取值等于 full 的行号（从上到下）。"""
+    if rows is None:
+        rows = range(row_count)
+    return sorted(y for y in rows if 0 <= y < row_count and values[y] == full)
+
+
+def _save_rows(board, cleared, saved):
+    """把即将消除的行的 (y, 各列颜色) 追加到 saved。"""
+    matrix = board.matrix
+    for y in cleared:
+        saved.append((y, tuple(column[y] for column in matrix)))
+
+
+def _expand(column, cleared, values):
+    """
+    _compact() 的逆操作：把 values 依次放回 cleared 中的行，
+    压紧时下移的行回到原来的位置。
+    """
+    lowest = cleared[-1]
+    kept = iter(column[len(cleared):lowest + 1])
+    restored = iter(values)
+    skip = set(cleared)
+    column[:lowest + 1] = [next(restored) if y in skip else next(kept) for y in range(lowest + 1)]
+
+
+def _compact(column, cleared, empty):
+    """
+    从 column 中删去 cleared 中的行，上方的行整体下移，顶部补 empty。
+    最低的被消除行以下的部分保持不动。
+    """
+    lowest = cleared[-1]
+    skip = set(cleared)
+    kept = [column[y] for y in range(lowest + 1) if y not in skip]
+    column[:lowest + 1] = [empty] * len(cleared) + kept
+
+
+# 按宽度缓存的方块行掩码表
+_mask_tables = {}
+
+
+def piece_masks(width):
+    """
+    预先计算每种方块、每个旋转状态在每一列上的行掩码。
+
+    返回的表按 table[mino - 1][r][x] 取值，得到 ((i, mask), ...)：
+    i 为相对方块左上角的行偏移，mask 为该行被占用的列位（第 x 列对应 1 << x）。
+    方块在该列会越出左右边界时，对应的 x 不在表中。
+
+    参数:
+    width (int): 游戏板宽度。
+
+    返回:
+    list: 掩码表。
+    """
+    table = _mask_tables.get(width)
+    if table is not None:
+        return table
+
+    table = []
+    for rotations in tetrimino.shapes:
+        per_rotation = []
+        for shape in rotations:
+            min_x, min_y, max_x, max_y = shape.bbox
+            per_x = {}
+            for x in range(-min_x, width - max_x):
+                rows = []
+                for i in range(min_y, max_y + 1):
+                    mask = 0
+                    for cx, cy in shape.cells:
+                        if cy == i:
+                            mask |= 1 << (x + cx)
+                    rows.append((i, mask))
+                per_x[x] = tuple(rows)
+            per_rotation.append(per_x)
+        table.append(per_rotation)
+
+    _mask_tables[width] = table
+    return table
+
+
+class kick_cache:
+    """
+    有上限的 LRU 旋转结果缓存，按 (方块, 旋转前状态, 旋转后状态, 局部特征) 保存
+    踢墙表中第一个可用位移的序号（-1 表示无法旋转）。
+
+    局部特征是方块周围 8x8 区域的占用位（越界处视为已占用），
+    踢墙的所有候选位置都落在这个区域内，因此同样的局部堆叠形状
+    无论出现在游戏板的哪个位置，旋转结果都相同，不必再逐个检测。
+    """
+
+    def __init__(self, limit=65536):
+        """
+        参数:
+        limit (int): 最多缓存的结果数量。
+        """
+        self.limit = limit
+        self.results = OrderedDict()
+        self.hits = 0    # 命中次数
+        self.misses = 0  # 未命中（实际逐个检测候选位置）的次数
+
+    def get(self, key):
+        """返回缓存的结果，没有时返回 None。"""
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)  # 标记为最近使用
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+    def put(self, key, result):
+        """保存一个结果，超出上限时丢弃最久未使用的结果。"""
+        self.results[key] = result
+        if len(self.results) > self.limit:
+            self.results.popitem(last=False)
+
+
+# 所有位棋盘共用的旋转结果缓存
+kicks = kick_cache()
+
+# 局部特征区域：方块左上角向左、向上各 2 格，共 8 列 8 行，覆盖所有踢墙位移
+_window_pad = 2
+_window_size = 8
+_window_mask = (1 << _window_size) - 1
+
+
+class BitBoard(Board):
+    """
+    位棋盘：每一行用一个整数位掩码表示，第 x 列对应 1 << x。
+    碰撞检测只需对几行做按位与；颜色仍保存在平行的 matrix[x][y] 中供界面绘制。
+    """
+
+    def __init__(self, width=10, rows=21):
+        """
+        参数:
+        width (int): 游戏板宽度。
+        rows (int): 游戏板总行数（含隐藏的出生行）。
+        """
+        self.width = width
+        self.rows = rows
+        self.keys = cell_keys(width, rows)  # 每个格子的 Zobrist 键
+        self.full = (1 << width) - 1  # 满行的掩码
+        self.masks = piece_masks(width)
+        # 行掩码左移 _window_pad + 2 位后，两侧的墙壁位（视为已占用）
+        self.walls = (1 << (_window_pad + 2)) - 1 | ((1 << (_window_size + 2)) - 1) << (width + _window_pad + 2)
+        self.clear()
+
+    def clear(self):
+        """清空游戏板。"""
+        self.bits = [0] * self.rows
+        self.matrix = [[0 for y in range(self.rows)] for x in range(self.width)]
+        _reset_stats(self)
+
+    def copy(self):
+        """返回一个内容相同、互不影响的游戏板。"""
+        other = BitBoard.__new__(BitBoard)
+        other.width = self.width
+        other.rows = self.rows
+        other.keys = self.keys
+        other.full = self.full
+        other.masks = self.masks
+        other.walls = self.walls
+        other.bits = self.bits[:]
+        other.matrix = [column[:] for column in self.matrix]
+        _copy_stats(self, other)
+        return other
+
+    def collides(self, x, y, mino, r):
+        """
+        判断方块放在 (x, y) 处是否越界或与已有方块重叠。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 旋转状态（0-3）。
+
+        返回:
+        bool: 有冲突则返回 True。
+        """
+        masks = self.masks[mino - 1][r].get(x)
+        if masks is None:
+            return True  # 超出左右边界
+        bits = self.bits
+        for i, mask in masks:
+            row = y + i
+            if row < 0 or row >= self.rows or bits[row] & mask:
+                return True
+        return False
+
+    def window(self, x, y):
+        """
+        返回 (x, y) 周围 8x8 区域的占用位，按行拼成一个整数，越界处视为已占用。
+        方块的 x 坐标不小于 -2，左移 _window_pad + 2 位后右移 x + 2 位不会出现负数。
+        """
+        bits = self.bits
+        walls = self.walls
+        signature = 0
+        for row in range(y - _window_pad, y - _window_pad + _window_size):
+            if 0 <= row < self.rows:
+                line = (bits[row] << (_window_pad + 2) | walls) >> (x + 2) & _window_mask
+            else:
+                line = _window_mask  # 游戏板上下边界之外
+            signature = signature << _window_size | line
+        return signature
+
+    def kick(self, x, y, mino, r, target):
+        """
+        按 SRS 踢墙表找出方块从状态 r 旋转到 target 时可用的位移。
+        先查局部特征的缓存；未命中时在一个循环里用预先计算的行掩码检测全部候选位置。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 当前旋转状态（0-3）。
+        target (int): 旋转后的状态（0-3）。
+
+        返回:
+        tuple: 第一个不冲突的位移 (ox, oy)；全部冲突时返回 None。
+        """
+        offsets = tetrimino.kicks[mino - 1][(r, target)]
+        if not self.collides(x, y, mino, target):
+            return offsets[0]  # 原地旋转成功（每张表的第一个位移都是 (0, 0)），不必计算局部特征
+        key = (mino, r, target, self.window(x, y))
+        index = kicks.get(key)
+        if index is None:
+            index = -1
+            table = self.masks[mino - 1][target]
+            bits = self.bits
+            rows = self.rows
+            for n, (ox, oy) in enumerate(offsets):
+                masks = table.get(x + ox)
+                if masks is None:
+                    continue  # 超出左右边界
+                for i, mask in masks:
+                    row = y + oy + i
+                    if row < 0 or row >= rows or bits[row] & mask:
+                        break
+                else:
+                    index = n
+                    break
+            kicks.put(key, index)
+        return offsets[index] if index >= 0 else None
+
+    def lock(self, x, y, mino, r):
+        """
+        把方块写入位掩码和颜色数组。
+
+        返回:
+        range: 方块占用的行，只有这些行可能因此变满。
+        """
+        masks = self.masks[mino - 1][r][x]
+        for i, mask in masks:
+            self.bits[y + i] |= mask
+        shape = tetrimino.shapes[mino - 1][r]
+        for cx, cy in shape.cells:
+            self.matrix[x + cx][y + cy] = mino
+        _place(self, x, y, shape)
+        return range(y + masks[0][0], y + masks[-1][0] + 1)
+
+    def clear_lines(self, rows=None, saved=None):
+        """
+        消除满行（行掩码等于满行掩码），并在一次遍历中压紧其余行。
+
+        参数:
+        rows: 需要检查的行，通常是 lock() 的返回值；为 None 时检查全部行。
+        saved (list): 如果给出，把被消除的行的 (y, 各列颜色) 追加进去，供 restore_lines() 撤销。
+
+        返回:
+        list: 被消除的行号（从上到下）。
+        """
+        cleared = _full_rows(self.bits, self.full, self.rows, rows)
+        if cleared:
+            if saved is not None:
+                _save_rows(self, cleared, saved)
+            old = _rows_hash(self, cleared[-1])
+            _compact(self.bits, cleared, 0)
+            for column in self.matrix:
+                _compact(column, cleared, 0)
+            _lower_tops(self, cleared, old)
+        return cleared
+
+    def unlock(self, x, y, mino, r):
+        """从游戏板上移除 lock() 写入的方块（用于撤销），方块所在几列的列高和统计值由 load_stats() 还原。"""
+        for i, mask in self.masks[mino - 1][r][x]:
+            self.bits[y + i] &= ~mask
+        for cx, cy in tetrimino.shapes[mino - 1][r].cells:
+            self.matrix[x + cx][y + cy] = 0
+
+    def restore_lines(self, saved):
+        """把 clear_lines() 消除并记录在 saved 中的行放回原处（用于撤销），列高和方块数回到消行前。"""
+        cleared = [y for y, colors in saved]
+        _expand(self.bits, cleared, [self.full] * len(saved))
+        for x, column in enumerate(self.matrix):
+            _expand(column, cleared, [colors[x] for y, colors in saved])
+        _raise_tops(self, cleared)
+
+
+class ByteBoard(Board):
+    """
+    紧凑的游戏板：所有格子的颜色按 y * width + x 存放在一块连续的字节缓冲区中。
+
+    行可以用 row(y) 取得零拷贝的 memoryview；matrix[x] 是按列跨步的 memoryview，
+    保持与其他游戏板相同的 matrix[x][y] 读写方式。clear() 和 copy() 都是对整块
+    缓冲区的一次操作，快照开销很小；也可以在外部缓冲区（例如一个大的 bytearray
+    或 NumPy 数组）上创建，让许多游戏板共用同一块内存。
+    """
+
+    def __init__(self, width=10, rows=21, buffer=None, offset=0):
+        """
+        参数:
+        width (int): 游戏板宽度。
+        rows (int): 游戏板总行数（含隐藏的出生行）。
+        buffer: 可写的字节缓冲区，为 None 时新建一个 bytearray。
+        offset (int): 本游戏板在 buffer 中的起始字节。
+        """
+        self.width = width
+        self.rows = rows
+        self.keys = cell_keys(width, rows)  # 每个格子的 Zobrist 键
+        self.size = width * rows
+        if buffer is None:
+            buffer = bytearray(self.size)
+        self._attach(memoryview(buffer).cast('B')[offset:offset + self.size])
+        self.clear()
+
+    def _attach(self, cells):
+        """使用 cells 作为格子缓冲区，并建立按列跨步的视图。"""
+        self.cells = cells
+        self.matrix = [cells[x::self.width] for x in range(self.width)]
+
+    def clear(self):
+        """清空游戏板（原地清零，不重新分配内存）。"""
+        self.cells[:] = bytes(self.size)
+        self.counts = [0] * self.rows
+        _reset_stats(self)
+
+    def copy(self):
+        """返回一个内容相同、互不影响的游戏板，格子数据只复制一次。"""
+        other = ByteBoard.__new__(ByteBoard)
+        other.width = self.width
+        other.rows = self.rows
+        other.keys = self.keys
+        other.size = self.size
+        other._attach(memoryview(bytearray(self.cells)))
+        other.counts = self.counts[:]
+        _copy_stats(self, other)
+        return other
+
+    def row(self, y):
+        """返回第 y 行格子的 memoryview（零拷贝）。"""
+        return self.cells[y * self.width:(y + 1) * self.width]
+
+    def collides(self, x, y, mino, r):
+        """
+        判断方块放在 (x, y) 处是否越界或与已有方块重叠。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 旋转状态（0-3）。
+
+        返回:
+        bool: 有冲突则返回 True。
+        """
+        cells = self.cells
+        width = self.width
+
+        for cx, cy in tetrimino.shapes[mino - 1][r].cells:
+            if (x + cx) < 0 or (x + cx) >= width or (y + cy) < 0 or (y + cy) >= self.rows:
+                return True  # 超出边界
+            elif cells[(y + cy) * width + x + cx] != 0:
+                return True  # 已经有其他方块
+
+        return False
+
+    def lock(self, x, y, mino, r):
+        """
+        把方块写入游戏板。
+
+        返回:
+        range: 方块占用的行，只有这些行可能因此变满。
+        """
+        shape = tetrimino.shapes[mino - 1][r]
+        for cx, cy in shape.cells:
+            self.cells[(y + cy) * self.width + x + cx] = mino
+            self.counts[y + cy] += 1
+        _place(self, x, y, shape)
+        return range(y + shape.bbox[1], y + shape.bbox[3] + 1)
+
+    def clear_lines(self, rows=None, saved=None):
+        """
+        消除满行，保留下来的行整块下移，顶部补空行。
+
+        参数:
+        rows: 需要检查的行，通常是 lock() 的返回值；为 None 时检查全部行。
+        saved (list): 如果给出，把被消除的行的 (y, 各列颜色) 追加进去，供 restore_lines() 撤销。
+
+        返回:
+        list: 被消除的行号（从上到下）。
+        """
+        cleared = _full_rows(self.counts, self.width, self.rows, rows)
+        if cleared:
+            if saved is not None:
+                _save_rows(self, cleared, saved)
+            old = _rows_hash(self, cleared[-1])
+            width = self.width
+            cells = self.cells
+            lowest = cleared[-1]
+            skip = set(cleared)
+            kept = b''.join(cells[y * width:(y + 1) * width] for y in range(lowest + 1) if y not in skip)
+            cells[:(lowest + 1) * width] = bytes(len(cleared) * width) + kept
+            _compact(self.counts, cleared, 0)
+            _lower_tops(self, cleared, old)
+        return cleared
+
+    def unlock(self, x, y, mino, r):
+        """从游戏板上移除 lock() 写入的方块（用于撤销），方块所在几列的列高和统计值由 load_stats() 还原。"""
+        for cx, cy in tetrimino.shapes[mino - 1][r].cells:
+            self.cells[(y + cy) * self.width + x + cx] = 0
+            self.counts[y + cy] -= 1
+
+    def restore_lines(self, saved):
+        """把 clear_lines() 消除并记录在 saved 中的行放回原处（用于撤销），列高和方块数回到消行前。"""
+        width = self.width
+        cells = self.cells
+        cleared = [y for y, colors in saved]
+        lowest = cleared[-1]
+        kept = bytes(cells[len(saved) * width:(lowest + 1) * width])
+        restored = iter(saved)
+        rebuilt = bytearray()
+        for y in range(lowest + 1):
+            if y in cleared:
+                rebuilt += bytes(next(restored)[1])
+            else:
+                rebuilt += kept[:width]
+                kept = kept[width:]
+        cells[:(lowest + 1) * width] = rebuilt
+        _expand(self.counts, cleared, [width] * len(saved))
+        _raise_tops(self, cleared)
+
+
+# 可通过名字选择的游戏板类型
+board_types = {
+    'list': ListBoard,
+    'bit': BitBoard,
+    'byte': ByteBoard,
+}
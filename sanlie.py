@@ -0,0 +1,172 @@
+# Zobrist 散列与置换表：给搜索用的局面计算 64 位散列值，并缓存已经算过的局面
+# 游戏板的散列由 qipan 在锁定和消行时增量更新，方块部分在这里按表异或得到
+import sys
+from random import Random
+
+# 生成随机键的固定种子，保证每次运行得到同样的散列值
+_seed = 20250601
+
+# 按 (宽度, 行数) 缓存的格子键表
+_cell_tables = {}
+
+
+def cell_keys(width, rows):
+    """
+    返回每个格子的 Zobrist 键，按 y * width + x 排列。
+
+    参数:
+    width (int): 游戏板宽度。
+    rows (int): 游戏板总行数。
+
+    返回:
+    list: 64 位随机整数列表。
+    """
+    keys = _cell_tables.get((width, rows))
+    if keys is None:
+        rng = Random(_seed ^ (width << 16) ^ rows)
+        keys = [rng.getrandbits(64) for i in range(width * rows)]
+        _cell_tables[(width, rows)] = keys
+    return keys
+
+
+# 方块部分的键：类型与旋转、位置、Hold 和 NEXT
+# 坐标加上 _offset 后作为下标，方块左上角的坐标不会小于 -_offset
+_offset = 4
+_rng = Random(_seed)
+piece_keys = [[_rng.getrandbits(64) for r in range(4)] for mino in range(8)]  # piece_keys[mino][r]
+x_keys = [_rng.getrandbits(64) for x in range(64)]
+y_keys = [_rng.getrandbits(64) for y in range(64)]
+hold_keys = [_rng.getrandbits(64) for mino in range(9)]  # hold_keys[mino + 1]，-1 表示未持有
+next_keys = [_rng.getrandbits(64) for mino in range(8)]
+hold_used_key = _rng.getrandbits(64)
+del _rng
+
+
+def piece_hash(mino, r, x, y):
+    """
+    返回下落中的方块的散列值。
+
+    参数:
+    mino (int): 方块类型（1-7）。
+    r (int): 旋转状态（0-3）。
+    x (int): 方块左上角的x坐标。
+    y (int): 方块左上角的y坐标。
+
+    返回:
+    int: 64 位散列值。
+    """
+    return piece_keys[mino][r] ^ x_keys[x + _offset] ^ y_keys[y + _offset]
+
+
+class TranspositionTable:
+    """
+    有上限的置换表：固定数量的槽位，按散列值取模定位，每个槽位保存一个局面。
+
+    两个局面落到同一个槽位时按 policy 决定是否替换：
+    'always' 总是用新局面替换旧局面；
+    'depth' 只有新局面的搜索深度不小于旧局面时才替换，保留更有价值的结果。
+    槽位中保存完整的散列值，取出时核对，不会把别的局面的结果当成命中。
+    """
+
+    policies = ('always', 'depth')
+
+    def __init__(self, capacity=1 << 16, policy='always'):
+        """
+        参数:
+        capacity (int): 槽位数量。
+        policy (str): 替换策略，'always' 或 'depth'。
+        """
+        if policy not in self.policies:
+            raise ValueError("未知的替换策略: %r" % (policy,))
+        self.capacity = capacity
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        """清空置换表和统计数据。"""
+        self.keys = [None] * self.capacity
+        self.depths = [0] * self.capacity
+        self.values = [None] * self.capacity
+        self.used = 0        # 已占用的槽位数
+        self.probes = 0      # 查询次数
+        self.hits = 0        # 命中次数
+        self.stores = 0      # 写入次数
+        self.replaced = 0    # 替换掉其他局面的次数
+        self.rejected = 0    # 按替换策略放弃写入的次数
+
+    def probe(self, key):
+        """
+        查询局面。
+
+        参数:
+        key (int): 局面的散列值。
+
+        返回:
+        保存的结果；没有时返回 None。
+        """
+        self.probes += 1
+        slot = key % self.capacity
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        return None
+
+    def store(self, key, value, depth=0):
+        """
+        保存局面的结果。
+
+        参数:
+        key (int): 局面的散列值。
+        value: 要保存的结果。
+        depth (int): 得到结果时的搜索深度，供 'depth' 策略比较。
+
+        返回:
+        bool: 实际写入返回 True。
+        """
+        slot = key % self.capacity
+        old = self.keys[slot]
+        if old is None:
+            self.used += 1
+        elif old != key:
+            if self.policy == 'depth' and depth < self.depths[slot]:
+                self.rejected += 1
+                return False
+            self.replaced += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.values[slot] = value
+        self.stores += 1
+        return True
+
+    @property
+    def hit_rate(self):
+        """命中次数占查询次数的比例（0-1）。"""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def memory(self):
+        """
+        估算置换表占用的内存（字节）：三个槽位列表本身，加上已保存的散列值对象。
+        保存的结果对象可能与别处共享，不计算在内。
+
+        返回:
+        int: 字节数。
+        """
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.depths) + sys.getsizeof(self.values)
+        return size + self.used * sys.getsizeof(1 << 63)
+
+    def stats(self):
+        """
+        返回:
+        dict: 容量、占用、查询、命中率、替换次数和内存估算。
+        """
+        return {
+            'capacity': self.capacity,
+            'used': self.used,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate,
+            'stores': self.stores,
+            'replaced': self.replaced,
+            'rejected': self.rejected,
+            'memory': self.memory(),
+        }
@@ -0,0 +1,116 @@
+# 固定步长的模拟时钟：不依赖 pygame 定时器，用高精度时钟驱动游戏逻辑；以及每帧 CPU 时间统计
+import time
+
+
+class FixedTimestep:
+    """
+    把真实经过的时间累积起来，按固定步长切成若干个模拟步。
+
+    每一帧调用一次 advance()，得到本帧应执行的模拟步数；剩余不足一步的
+    时间保留在 accumulator 中，渲染时可用 alpha 在两步之间插值。
+    这样下落速度只取决于真实时间，不受渲染快慢和事件多少的影响。
+    """
+
+    def __init__(self, rate=100, max_steps=10, clock=time.perf_counter):
+        """
+        参数:
+        rate (int): 每秒模拟步数。
+        max_steps (int): 一帧最多补跑的步数，卡顿后多出的时间直接丢弃，
+                         避免越落后越要补跑的“死亡螺旋”。
+        clock: 返回秒数的高精度时钟函数。
+        """
+        self.rate = rate
+        self.step = 1.0 / rate          # 每步的秒数
+        self.step_ms = 1000.0 / rate    # 每步的毫秒数
+        self.max_steps = max_steps
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """从现在重新开始计时，丢弃累积的时间（用于暂停恢复等场合）。"""
+        self.last = self.clock()
+        self.accumulator = 0.0
+
+    def advance(self):
+        """
+        累积自上次调用以来经过的时间。
+
+        返回:
+        int: 本帧应执行的模拟步数。
+        """
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0  # 丢弃补不完的时间
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        """当前时刻在两个模拟步之间的位置（0-1），用于渲染插值。"""
+        return self.accumulator / self.step
+
+
+class FrameStats:
+    """
+    统计每帧消耗的 CPU 时间（time.process_time），用来确认空闲界面几乎不占 CPU。
+
+    主循环每处理完一帧调用一次 frame()；report_interval 大于 0 时，
+    每隔这么多秒在控制台输出一次平均每帧 CPU 时间和 CPU 占用率。
+    """
+
+    def __init__(self, report_interval=0.0, clock=time.perf_counter, cpu_clock=time.process_time):
+        """
+        参数:
+        report_interval (float): 输出统计的间隔（秒），0 表示不输出。
+        clock: 返回真实秒数的高精度时钟函数。
+        cpu_clock: 返回本进程已用 CPU 秒数的函数。
+        """
+        self.report_interval = report_interval
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.last_ms = 0.0  # 最近一帧的 CPU 毫秒数
+        self.reset()
+
+    def reset(self):
+        """开始新一轮统计。"""
+        self.frames = 0
+        self.cpu_total = 0.0
+        self.started = self.clock()
+        self.last_cpu = self.cpu_clock()
+
+    def frame(self):
+        """记录一帧结束，累计这一帧用掉的 CPU 时间。"""
+        cpu = self.cpu_clock()
+        used = cpu - self.last_cpu
+        self.last_cpu = cpu
+        self.last_ms = used * 1000.0
+        self.cpu_total += used
+        self.frames += 1
+
+        if self.report_interval and self.clock() - self.started >= self.report_interval:
+            print(self.report())
+            self.reset()
+
+    @property
+    def cpu_ms(self):
+        """本轮统计中平均每帧的 CPU 毫秒数。"""
+        return self.cpu_total * 1000.0 / self.frames if self.frames else 0.0
+
+    @property
+    def usage(self):
+        """本轮统计中 CPU 时间占真实时间的比例（0-1）。"""
+        elapsed = self.clock() - self.started
+        return self.cpu_total / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """
+        返回:
+        str: 帧数、平均每帧 CPU 时间和 CPU 占用率的说明文字。
+        """
+        return "帧数 %d，平均每帧 CPU %.3f 毫秒，CPU 占用 %.1f%%" % (self.frames, self.cpu_ms, self.usage * 100)
@@ -0,0 +1,478 @@
+# 在线排行榜：asyncio 服务器与游戏客户端
+# 协议为长度前缀的 JSON：每条消息是 4 字节大端长度加上 UTF-8 编码的 JSON 对象，一问一答
+# 请求:
+#   {"op": "submit", "id": 编号, "name": 名字, "score": 分数, "created": 时间戳}
+#                                                   -> {"ok": true, "rank": 名次, "total": 成绩数, "duplicate": 是否重复}
+#   {"op": "top", "k": K}                           -> {"ok": true, "top": [[名字, 分数], ...]}
+#   {"op": "rank", "score": 分数}                   -> {"ok": true, "rank": 名次, "total": 成绩数}
+# 编号由客户端生成：应答丢失后重发的成绩带着同样的编号，服务器只保存一次
+# 出错时返回 {"ok": false, "error": 说明}
+# 用法示例：python wangluo.py --host 127.0.0.1 --port 7650 --db paihangbang_server.db
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from paihangbang import Leaderboard, TopScores, check_score, default_leaders, fsync_policies
+
+log = logging.getLogger('wangluo')
+
+default_host = '127.0.0.1'
+default_port = 7650
+
+# 单条消息的最大长度（字节），防止异常的长度前缀让服务器分配大量内存
+max_message = 1 << 16
+
+_header = struct.Struct('>I')
+
+
+async def read_message(reader):
+    """
+    读取一条消息。
+
+    参数:
+    reader (asyncio.StreamReader): 连接的读取端。
+
+    返回:
+    dict: 消息；对方在两条消息之间关闭连接时返回 None。
+    消息过长、不是合法的 JSON 或不是 JSON 对象时抛出 ValueError。
+    """
+    try:
+        header = await reader.readexactly(_header.size)
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            return None
+        raise ConnectionError("连接在消息中途关闭") from error
+    size, = _header.unpack(header)
+    if size > max_message:
+        raise ValueError("消息过长: %d 字节" % size)
+    try:
+        body = await reader.readexactly(size)
+    except asyncio.IncompleteReadError as error:
+        raise ConnectionError("连接在消息中途关闭") from error
+    message = json.loads(body)
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    return message
+
+
+def write_message(writer, message):
+    """
+    写入一条消息（调用方负责 await writer.drain()）。
+
+    参数:
+    writer (asyncio.StreamWriter): 连接的写入端。
+    message (dict): 消息。
+    """
+    data = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    writer.write(_header.pack(len(data)) + data)
+
+
+class LeaderboardServer:
+    """
+    在线排行榜服务器。
+
+    提交的成绩先放入待写列表，凑够 batch_size 条或每隔 flush_interval 秒在一个事务中写入
+    paihangbang.Leaderboard；前 hot_k 名保存在内存中的 TopScores 里，查询前 K 名时不访问数据库。
+    只接收能保存的分数（paihangbang.check_score）；写入失败的一批放回待写列表，下次写入时重试。
+    SQLite 连接只能在创建它的线程中使用，所以数据库的所有操作都交给同一个单线程执行器，
+    它们按提交顺序执行：名次查询总能看到在它之前开始写入的成绩。
+    """
+
+    def __init__(self, path='paihangbang_server.db', hot_k=10, batch_size=256, flush_interval=0.5, fsync='batch'):
+        """
+        参数:
+        path (str): 数据库文件路径。
+        hot_k (int): 内存中保留的前几名。
+        batch_size (int): 待写成绩达到这么多条时立即写入。
+        flush_interval (float): 最长写入间隔（秒）。
+        fsync (str): 落盘策略，见 paihangbang.fsync_policies。
+        """
+        self.path = path
+        self.hot_k = hot_k
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wangluo')
+        self.board = None
+        self.server = None
+        self.pending = []    # 还没有写入数据库的成绩 (名字, 分数, 时间戳, 编号)
+        self.keys = set()    # 待写和正在写入的成绩的编号，用来识别还没落盘的重复提交
+        self.hot = None      # 内存中的前 hot_k 名（TopScores）
+        self.total = 0       # 成绩总数（包括待写的）
+        self.flushes = 0     # 已写入的批数
+        self.failures = 0    # 连续写入失败的次数
+        self._flusher = None
+        self._wake = None
+
+    async def _call(self, function, *args):
+        """在数据库线程中执行 function(*args)。"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def start(self, host=default_host, port=default_port):
+        """
+        打开数据库并开始监听。
+
+        参数:
+        host (str): 监听地址。
+        port (int): 监听端口，0 表示由系统分配。
+
+        返回:
+        tuple: 实际监听的 (地址, 端口)。
+        """
+        self.board = await self._call(Leaderboard, self.path, None, 10000, self.fsync)
+        self.hot = TopScores(self.hot_k, await self._call(self.board.top, self.hot_k))
+        self.total = await self._call(self.board.count)
+        self._wake = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def _flush_loop(self):
+        """后台任务：待写成绩够一批时立即写入，否则每隔 flush_interval 秒写入一次。"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # 成绩已经放回待写列表，下次写入时重试；写入任务不能因此结束
+                log.exception("写入成绩失败（连续 %d 次），稍后重试", self.failures)
+
+    async def flush(self):
+        """把待写的成绩在一个事务中写入数据库；失败时把它们放回待写列表的开头，再抛出异常。"""
+        if not self.pending:
+            return
+        records, self.pending = self.pending, []
+        keys = [record[3] for record in records]
+        try:
+            await self._call(self.board.submit_many, [record[:3] for record in records], keys)
+        except Exception:
+            # 事务已回滚：编号留在 keys 中，重试之前的重复提交仍然能被识别
+            self.pending[:0] = records
+            self.failures += 1
+            raise
+        self.keys.difference_update(keys)
+        self.failures = 0
+        self.flushes += 1
+
+    def top(self, k):
+        """返回前 k 名（k 不超过 hot_k 时直接取自内存）。"""
+        return self.hot.items(k)
+
+    async def rank(self, score):
+        """返回分数 score 的名次：数据库中和待写的成绩里严格高于它的数目加一。"""
+        # 先取出当前的待写列表：它在这次查询之后才会被写入，不会与数据库中的成绩重复计数
+        pending = self.pending
+        rank = await self._call(self.board.rank, score)
+        return rank + sum(1 for name, other, created, key in pending if other > score)
+
+    async def seen(self, key):
+        """返回编号为 key 的成绩是否已经收到（待写、正在写入或已在数据库中）。"""
+        if key in self.keys:
+            return True
+        stored = await self._call(self.board.has_key, key)
+        # 查询期间同一编号可能刚被另一个连接提交
+        return stored or key in self.keys
+
+    def submit(self, name, score, created, key=None):
+        """接收一条成绩：并入内存中的前几名，放入待写列表。"""
+        self.hot.push(name, score)
+        self.pending.append((name, score, created, key))
+        if key is not None:
+            self.keys.add(key)
+        self.total += 1
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    async def handle(self, request):
+        """
+        处理一条请求。
+
+        参数:
+        request (dict): 请求消息。
+
+        返回:
+        dict: 应答消息。
+        """
+        op = request.get('op')
+        if op == 'submit':
+            name = str(request['name'])
+            score = check_score(request['score'])
+            key = request.get('id')
+            key = None if key is None else str(key)
+            duplicate = key is not None and await self.seen(key)
+            if not duplicate:
+                self.submit(name, score, float(request.get('created', time.time())), key)
+            return {'ok': True, 'rank': await self.rank(score), 'total': self.total, 'duplicate': duplicate}
+        if op == 'top':
+            k = int(request.get('k', 3))
+            if k > self.hot_k:
+                await self.flush()
+                top = await self._call(self.board.top, k)
+            else:
+                top = self.top(k)
+            return {'ok': True, 'top': top}
+        if op == 'rank':
+            return {'ok': True, 'rank': await self.rank(check_score(request['score'])), 'total': self.total}
+        return {'ok': False, 'error': "未知的请求: %r" % (op,)}
+
+    async def _handle(self, reader, writer):
+        """处理一个连接上的所有请求，直到对方关闭连接或发来无法解析的消息。"""
+        try:
+            while True:
+                try:
+                    request = await read_message(reader)
+                except ValueError as error:
+                    write_message(writer, {'ok': False, 'error': str(error)})
+                    break
+                if request is None:
+                    break
+                try:
+                    response = await self.handle(request)
+                except (KeyError, TypeError, ValueError, OverflowError) as error:
+                    response = {'ok': False, 'error': "请求格式不对: %r" % (error,)}
+                write_message(writer, response)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        """停止监听，写入剩余的成绩并关闭数据库。"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        if self.board is not None:
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("关闭时写入成绩失败，%d 条成绩没有保存", len(self.pending))
+            await self._call(self.board.close)
+        self.executor.shutdown()
+
+
+class ScoreClient:
+    """
+    游戏使用的在线排行榜客户端。
+
+    网络通信在后台线程的 asyncio 事件循环中进行，submit() 只把成绩放入发件箱并立即返回，
+    不会阻塞 pygame 的主循环。发件箱同时保存在本地文件中：服务器连不上时每隔 retry_interval
+    秒重试，游戏退出后未发出的成绩在下次启动时继续发送。每条成绩带有客户端生成的编号，
+    应答超时后重发不会让服务器保存两次。后台线程中的任何错误都只会导致稍后重试。
+    每次发送成功后重新获取前 k 名，保存在 top 中供标题界面显示。
+    """
+
+    def __init__(self, host=default_host, port=default_port, outbox='paihangbang_outbox.json',
+                 k=3, timeout=2.0, retry_interval=5.0):
+        """
+        参数:
+        host (str): 服务器地址。
+        port (int): 服务器端口。
+        outbox (str): 发件箱文件路径，None 表示只保存在内存中。
+        k (int): 获取的前几名。
+        timeout (float): 连接和每次请求的超时时间（秒）。
+        retry_interval (float): 连不上服务器时的重试间隔（秒）。
+        """
+        self.host = host
+        self.port = port
+        self.outbox_path = outbox
+        self.k = k
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.top = None        # 服务器上的前 k 名，还没有取到时为 None
+        self.rank = None       # 最近一次发送的成绩的 (名次, 成绩数)
+        self.sent = 0          # 已发送的成绩数
+        self.failures = 0      # 连续失败的次数
+        self.inbox = queue.SimpleQueue()  # 主线程交给后台线程的成绩 (编号, 名字, 分数, 时间戳)
+        self.outbox = self._load_outbox()
+        self.loop = None
+        self._wake = None
+        self._stop = False
+        ready = threading.Event()
+        self.thread = threading.Thread(target=asyncio.run, args=(self._main(ready),), name='wangluo', daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _load_outbox(self):
+        """读取发件箱文件，不存在或损坏时返回空列表。"""
+        if self.outbox_path is None:
+            return []
+        try:
+            with open(self.outbox_path) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return []
+        # 旧版本的发件箱没有编号，补上一个
+        return [tuple(record) if len(record) == 4 else (uuid.uuid4().hex,) + tuple(record) for record in records]
+
+    def _save_outbox(self):
+        """把发件箱写回文件（先写临时文件再替换）；发件箱为空时删除文件。"""
+        if self.outbox_path is None:
+            return
+        if not self.outbox:
+            if os.path.exists(self.outbox_path):
+                os.remove(self.outbox_path)
+            return
+        temp = self.outbox_path + '.tmp'
+        with open(temp, 'w') as f:
+            json.dump(self.outbox, f)
+        os.replace(temp, self.outbox_path)
+
+    def _receive(self):
+        """把主线程交来的成绩移入发件箱并写回文件。"""
+        received = False
+        while True:
+            try:
+                self.outbox.append(self.inbox.get_nowait())
+                received = True
+            except queue.Empty:
+                break
+        if received:
+            self._save_outbox()
+
+    def submit(self, name, score, created=None):
+        """
+        提交一条成绩，立即返回。
+
+        参数:
+        name (str): 玩家名字。
+        score (int): 得分。
+        created (float): 时间戳，缺省为当前时间。
+        """
+        self.inbox.put((uuid.uuid4().hex, name, int(score), time.time() if created is None else created))
+        if self.thread.is_alive():
+            try:
+                self.loop.call_soon_threadsafe(self._wake.set)
+                return
+            except RuntimeError:  # 事件循环刚好已经关闭
+                pass
+        # 后台线程已经结束：直接写入发件箱文件，下次启动时再发送
+        try:
+            self._receive()
+        except OSError:
+            pass  # 写不了文件时成绩留在内存中的发件箱里
+
+    def leaders(self, k=None):
+        """返回服务器上的前 k 名，记录不足时用 default_leaders 补齐；还没有取到时返回 None。"""
+        if self.top is None:
+            return None
+        k = self.k if k is None else k
+        return self.top[:k] + default_leaders[len(self.top):k]
+
+    async def _request(self, reader, writer, message):
+        """发送一条请求并等待应答。"""
+        write_message(writer, message)
+        await writer.drain()
+        response = await asyncio.wait_for(read_message(reader), self.timeout)
+        if response is None:
+            raise ConnectionError("服务器关闭了连接")
+        return response
+
+    async def _sync(self):
+        """连接服务器，依次发送发件箱中的成绩（每发出一条就从发件箱删除），最后获取前 k 名。"""
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            while self.outbox:
+                key, name, score, created = self.outbox[0]
+                response = await self._request(reader, writer, {
+                    'op': 'submit', 'id': key, 'name': name, 'score': score, 'created': created})
+                self.outbox.pop(0)
+                self._save_outbox()
+                self.sent += 1
+                if response.get('ok'):
+                    self.rank = (response['rank'], response['total'])
+            response = await self._request(reader, writer, {'op': 'top', 'k': self.k})
+            if response.get('ok'):
+                self.top = [tuple(entry) for entry in response['top']]
+        finally:
+            writer.close()
+
+    async def _main(self, ready):
+        """后台线程的事件循环：有新成绩或到了重试时间就与服务器同步一次。"""
+        self.loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        ready.set()
+        delay = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                self._receive()
+                if self._stop:
+                    break
+                await self._sync()
+                self.failures = 0
+                delay = None  # 同步成功后一直等到有新成绩
+            except Exception:
+                # 连不上、超时、应答不完整或格式不对都只记一次失败，稍后重试；线程只在 close() 时结束
+                if self._stop:
+                    break
+                self.failures += 1
+                delay = self.retry_interval
+
+    def close(self):
+        """结束后台线程；未发出的成绩留在发件箱文件中，下次启动时再发送。"""
+        self._stop = True
+        if self.thread.is_alive():
+            try:
+                self.loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass
+            self.thread.join()
+        try:
+            self._receive()
+        except OSError:
+            pass
+
+
+async def serve(host, port, path, hot_k, batch_size, flush_interval, fsync):
+    """启动服务器并一直运行，直到被中断。"""
+    server = LeaderboardServer(path, hot_k=hot_k, batch_size=batch_size, flush_interval=flush_interval, fsync=fsync)
+    address = await server.start(host, port)
+    print("排行榜服务器已启动: %s:%d" % address)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在线排行榜服务器")
+    parser.add_argument('--host', default=default_host, help="监听地址")
+    parser.add_argument('--port', type=int, default=default_port, help="监听端口")
+    parser.add_argument('--db', default='paihangbang_server.db', help="数据库文件路径")
+    parser.add_argument('--hot-k', type=int, default=10, help="内存中保留的前几名")
+    parser.add_argument('--batch-size', type=int, default=256, help="待写成绩达到这么多条时立即写入")
+    parser.add_argument('--flush-interval', type=float, default=0.5, help="最长写入间隔（秒）")
+    parser.add_argument('--fsync', default='batch', choices=tuple(fsync_policies), help="落盘策略")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.hot_k, args.batch_size, args.flush_interval, args.fsync))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
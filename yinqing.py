@@ -0,0 +1,426 @@
+# 无界面的游戏引擎：不导入 pygame，只负责俄罗斯方块的规则与状态
+# 可以脱离 USEREVENT 定时器被直接驱动，用于测试、机器人和批量模拟
+from random import Random
+from fangkuai import tetrimino
+from qipan import board_types
+from sanlie import piece_hash, hold_keys, next_keys, hold_used_key
+
+# step() 可接受的动作编号
+NOOP = 0        # 不操作，只推进一次下落
+LEFT = 1        # 左移
+RIGHT = 2       # 右移
+ROTATE_R = 3    # 向右旋转
+ROTATE_L = 4    # 向左旋转
+HARD_DROP = 5   # 硬降
+HOLD = 6        # 暂存（Hold）
+ACTIONS = (NOOP, LEFT, RIGHT, ROTATE_R, ROTATE_L, HARD_DROP, HOLD)
+
+# 一次消除 0-4 行时的基础得分（还要乘以当前等级）
+line_scores = (0, 50, 150, 350, 1000)
+
+# 每秒的模拟 tick 数：一次 tick() 推进 1/60 秒
+TICK_RATE = 60
+
+# 重力的定点数单位：G 表示每 tick 下落 1 行，小数部分逐 tick 累积，结果与帧率无关
+G = 65536
+
+# 各等级的重力（每 tick 下落的行数 × G）。1-12 级与原先 framerate 定时器的
+# 下落间隔（300、240、190 … 10 毫秒一行）相同，13-15 级继续加速到 20G（出现即落底）
+gravity_table = tuple(
+    G * 1000 // (TICK_RATE * ms) for ms in (300, 240, 190, 150, 120, 90, 70, 50, 40, 30, 20, 10)
+) + (3 * G, 5 * G, 20 * G)
+
+max_gravity = 20 * G   # 重力上限（20G）
+soft_drop_factor = 10  # 加速下落时的重力倍数（原先为 framerate * 1 对 framerate * 10）
+lock_delay = 30        # 方块触底后经过多少 tick 锁定（0.5 秒）
+
+
+class GameState:
+    """
+    一局游戏的全部状态，以及移动、旋转、Hold、硬降和自动下落的规则。
+
+    原先散落在主循环里的全局变量（matrix、dx、dy、rotation、mino、score、
+    goal 等）都成为这里的属性。界面层只负责把状态画出来，
+    并以 TICK_RATE 的固定频率调用 tick() 推进自动下落和锁定。
+    """
+
+    def __init__(self, seed=None, width=10, height=20, board='bit'):
+        """
+        参数:
+        seed: 随机数种子，相同的种子产生相同的方块序列。
+        width (int): 游戏板宽度（以方块为单位）。
+        height (int): 游戏板可见高度，另有一行隐藏的出生行。
+        board (str): 游戏板存储方式，'bit' 为位棋盘，'list' 为嵌套列表，
+                     'byte' 为连续的字节缓冲区。
+        """
+        self.width = width
+        self.height = height
+        self.spawn_x = width // 2 - 2  # 新方块出生时的 x 坐标
+        self.rng = Random(seed)
+        self.board = board_types[board](width, height + 1)
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        重置为一局新游戏。
+
+        参数:
+        seed: 如果给出，则重新设置随机数种子。
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+
+        self.board.clear()
+
+        self.score = 0             # 当前得分
+        self.level = 1             # 当前关卡等级
+        self.goal = self.level * 5  # 升级所需消除的行数目标
+        self.gravity_acc = 0       # 累积的下落距离（以 1/G 行为单位）
+        self.lock_ticks = 0        # 方块触底后已经过的 tick 数
+        self.game_over = False     # 是否游戏失败
+        self.lines = 0             # 累计消除行数
+        self.cleared_rows = []     # 最近一次锁定时消除的行号（供音效和动画使用）
+        self.pieces = 0            # 累计锁定的方块数
+
+        self.dx, self.dy = self.spawn_x, 0  # 当前方块的位置
+        self.rotation = 0                   # 当前方块的旋转状态
+
+        self.sequence = []  # 已经生成的方块序列，撤销后再次取出时得到同样的方块
+        self.drawn = 0      # 已经从 sequence 中取出的方块数
+        self._undo = []     # apply_placement() 的撤销栈
+
+        self.mino = self._draw()       # 当前方块类型（1-7）
+        self.next_mino = self._draw()  # 下一个方块类型
+
+        self.hold_used = False  # 当前方块是否已经 Hold 过
+        self.hold_mino = -1     # 持有的方块类型（-1 表示未持有）
+
+        self._ghost_y = None  # 缓存的投影落点行，方块左右移动、旋转或堆叠变化时失效
+
+    @property
+    def matrix(self):
+        """游戏板颜色数组 matrix[x][y]：0 为空，1-7 为方块颜色。"""
+        return self.board.matrix
+
+    @property
+    def hash(self):
+        """
+        当前局面的 Zobrist 散列值：游戏板（随锁定和消行增量维护）异或上
+        当前方块的类型、旋转和位置，以及持有方块、是否已经 Hold 和下一个方块。
+        """
+        digest = (self.board.hash ^ piece_hash(self.mino, self.rotation, self.dx, self.dy)
+                  ^ hold_keys[self.hold_mino + 1] ^ next_keys[self.next_mino])
+        if self.hold_used:
+            digest ^= hold_used_key
+        return digest
+
+    # 碰撞检测
+    def collides(self, x, y, mino, r):
+        """
+        判断方块放在 (x, y) 处是否越界或与已有方块重叠。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块左上角的y坐标。
+        mino (int): 方块类型（1-7）。
+        r (int): 旋转状态（0-3）。
+
+        返回:
+        bool: 有冲突则返回 True。
+        """
+        return self.board.collides(x, y, mino, r)
+
+    def is_bottom(self, x, y, mino, r):
+        """判断方块在 (x, y) 处是否无法继续下落。"""
+        return self.collides(x, y + 1, mino, r)
+
+    def is_leftedge(self, x, y, mino, r):
+        """判断方块在 (x, y) 处是否无法继续左移。"""
+        return self.collides(x - 1, y, mino, r)
+
+    def is_rightedge(self, x, y, mino, r):
+        """判断方块在 (x, y) 处是否无法继续右移。"""
+        return self.collides(x + 1, y, mino, r)
+
+    def is_stackable(self, mino):
+        """判断新方块能否在出生位置放置。"""
+        board = self.board
+        if board.max_height < board.rows - 2:
+            return True  # 出生的方块只占最上面两行，堆叠还没有到达那里
+        return not self.collides(self.spawn_x, 0, mino, 0)
+
+    def ghost_y(self):
+        """
+        返回当前方块直接落下后的 y 坐标（即投影位置）。
+
+        落点只在方块左右移动、旋转、换新方块或堆叠变化时才会改变，
+        自动下落不影响落点，因此结果会被缓存。
+        """
+        if self._ghost_y is None:
+            self._ghost_y = self.dy + self.board.drop_distance(self.dx, self.dy, self.mino, self.rotation)
+        return self._ghost_y
+
+    # 玩家操作
+    def move(self, step):
+        """
+        左右移动当前方块。
+
+        参数:
+        step (int): -1 为左移，1 为右移。
+
+        返回:
+        bool: 移动成功返回 True。
+        """
+        if self.game_over or self.collides(self.dx + step, self.dy, self.mino, self.rotation):
+            return False
+        self.dx += step
+        self._ghost_y = None
+        return True
+
+    def rotate(self, direction=1):
+        """
+        旋转当前方块，受阻时按 SRS 踢墙表（tetrimino.kicks）依次尝试微调位置。
+
+        参数:
+        direction (int): 1 为向右旋转，-1 为向左旋转。
+
+        返回:
+        bool: 旋转成功返回 True。
+        """
+        if self.game_over:
+            return False
+        target = (self.rotation + direction) % 4
+        offset = self.board.kick(self.dx, self.dy, self.mino, self.rotation, target)
+        if offset is None:
+            return False
+        self.dx += offset[0]
+        self.dy += offset[1]
+        self.rotation = target
+        self._ghost_y = None
+        return True
+
+    def hold(self):
+        """
+        暂存当前方块；已持有时与持有的方块交换。每个方块只能 Hold 一次。
+
+        返回:
+        bool: Hold 成功返回 True。
+        """
+        if self.game_over or self.hold_used:
+            return False
+        if self.hold_mino == -1:  # 第一次 Hold
+            self.hold_mino = self.mino
+            self.mino = self.next_mino
+            self.next_mino = self._draw()
+        else:  # 已有 Hold，交换
+            self.hold_mino, self.mino = self.mino, self.hold_mino
+        self.dx, self.dy = self.spawn_x, 0
+        self.rotation = 0
+        self.hold_used = True
+        self._ghost_y = None
+        return True
+
+    def hard_drop(self):
+        """
+        把当前方块直接落到底部并立即锁定。
+
+        返回:
+        int: 本次消除的行数。
+        """
+        if self.game_over:
+            return 0
+        self.dy = self.ghost_y()
+        return self._lock()
+
+    def gravity(self, soft_drop=False):
+        """
+        返回当前等级每 tick 的重力（以 1/G 行为单位）。
+
+        参数:
+        soft_drop (bool): 是否正在加速下落（按住下方向键）。
+        """
+        gravity = gravity_table[min(self.level, len(gravity_table)) - 1]
+        if soft_drop:
+            gravity = min(gravity * soft_drop_factor, max_gravity)
+        return gravity
+
+    def tick(self, soft_drop=False):
+        """
+        推进 1/60 秒：按当前等级的重力累积下落距离，满一行就下移，
+        高速时一个 tick 可以下移多行（20G 时直接落底）。
+        方块触底后经过 lock_delay 个 tick 锁定，然后生成下一个方块并结算消行。
+
+        参数:
+        soft_drop (bool): 是否正在加速下落（按住下方向键）。
+
+        返回:
+        int: 本次消除的行数。
+        """
+        if self.game_over:
+            return 0
+
+        self.gravity_acc += self.gravity(soft_drop)
+        rows = self.gravity_acc // G
+        if rows:
+            self.gravity_acc -= rows * G
+            rows = min(rows, self.ghost_y() - self.dy)  # 最多落到底
+            if rows:
+                self.dy += rows
+                self.lock_ticks = 0  # 下降到新的一行，锁定计时重新开始
+
+        if self.dy == self.ghost_y():  # 已经触底
+            self.gravity_acc = 0
+            self.lock_ticks += 1
+            if self.lock_ticks >= lock_delay:
+                return self._lock()
+        return 0
+
+    def fall_progress(self, alpha=0.0, soft_drop=False):
+        """
+        当前方块下落到下一行的进度，用于渲染插值。
+
+        参数:
+        alpha (float): 当前时刻在两个 tick 之间的位置（0-1）。
+        soft_drop (bool): 是否正在加速下落。
+
+        返回:
+        float: 0-1 之间的进度；方块已触底时为 0。
+        """
+        if self.game_over or self.dy == self.ghost_y():
+            return 0.0
+        return min(1.0, (self.gravity_acc + alpha * self.gravity(soft_drop)) / G)
+
+    def act(self, action):
+        """
+        执行一个动作，不推进时间（用于重放按键或机器人给出的动作序列）。
+
+        参数:
+        action (int): ACTIONS 中的动作编号。
+
+        返回:
+        int: 本次消除的行数（只有硬降会锁定方块）。
+        """
+        if action == HARD_DROP:
+            return self.hard_drop()
+        if action == LEFT:
+            self.move(-1)
+        elif action == RIGHT:
+            self.move(1)
+        elif action == ROTATE_R:
+            self.rotate(1)
+        elif action == ROTATE_L:
+            self.rotate(-1)
+        elif action == HOLD:
+            self.hold()
+        return 0
+
+    def step(self, action):
+        """
+        执行一个动作，然后推进一个 tick。
+
+        参数:
+        action (int): ACTIONS 中的动作编号。
+
+        返回:
+        int: 本次消除的行数。
+        """
+        if action == HARD_DROP:
+            return self.hard_drop()  # 硬降自带锁定，不再额外下落
+        self.act(action)
+        return self.tick()
+
+    # 搜索用的放置与撤销
+    def apply_placement(self, x, y, r, hold=False):
+        """
+        把当前方块（hold 为 True 时先 Hold）直接放到 (x, y, r) 并锁定、消行、
+        换上下一个方块，同时把还原所需的信息压入撤销栈，之后可用 undo() 精确还原。
+        与硬降一样不检查 (x, y, r) 能否由玩家操作到达，调用方应传入合法的落点。
+
+        参数:
+        x (int): 方块左上角的x坐标。
+        y (int): 方块落下后左上角的y坐标。
+        r (int): 旋转状态（0-3）。
+        hold (bool): 是否先 Hold，再放置换上来的方块。
+
+        返回:
+        int: 本次消除的行数。
+        """
+        state = (self.score, self.level, self.goal, self.lines, self.pieces,
+                 self.mino, self.next_mino, self.hold_mino, self.hold_used, self.drawn,
+                 self.dx, self.dy, self.rotation, self.gravity_acc, self.lock_ticks,
+                 self.game_over, self.cleared_rows)
+        if hold:
+            self.hold()
+        mino = self.mino
+        bbox = tetrimino.shapes[mino - 1][r].bbox
+        stats = self.board.save_stats(x + bbox[0], x + bbox[2] + 1)  # 消行时其余列由 restore_lines() 还原
+        self.dx, self.dy, self.rotation = x, y, r
+        saved = []  # 被消除的行及其颜色
+        erase_count = self._lock(saved)
+        self._undo.append((state, x, y, mino, r, saved, stats))
+        return erase_count
+
+    def undo(self):
+        """撤销最近一次 apply_placement()：放回消除的行，移除方块，还原得分、等级和方块序列。"""
+        state, x, y, mino, r, saved, stats = self._undo.pop()
+        board = self.board
+        if saved:
+            board.restore_lines(saved)
+        board.unlock(x, y, mino, r)
+        (self.score, self.level, self.goal, self.lines, self.pieces,
+         self.mino, self.next_mino, self.hold_mino, self.hold_used, self.drawn,
+         self.dx, self.dy, self.rotation, self.gravity_acc, self.lock_ticks,
+         self.game_over, self.cleared_rows) = state
+        board.load_stats(stats)
+        self._ghost_y = None
+
+    # 内部规则
+    def _draw(self):
+        """取出方块序列中的下一个方块，序列用完时再随机生成一个。"""
+        if self.drawn == len(self.sequence):
+            self.sequence.append(self.rng.randint(1, 7))
+        mino = self.sequence[self.drawn]
+        self.drawn += 1
+        return mino
+
+    def _lock(self, saved=None):
+        """
+        锁定当前方块、结算消行，再生成下一个方块，返回消除的行数。
+        先消行再判断出生位置：在出生的两行里补满一行的方块会先腾出空间，不会误判为游戏结束。
+        saved 不为 None 时记录被消除的行，供 undo() 使用。
+        """
+        self.lock_ticks = 0
+        self.gravity_acc = 0  # 新方块重新开始累积
+        self.score += 10 * self.level  # 放置得分
+        self.pieces += 1
+
+        touched = self.board.lock(self.dx, self.dy, self.mino, self.rotation)
+        self._ghost_y = None  # 堆叠已变化
+        erase_count = self._clear_lines(touched, saved)
+
+        if self.is_stackable(self.next_mino):  # 判断是否可以继续放置新方块
+            self.mino = self.next_mino
+            self.next_mino = self._draw()
+            self.dx, self.dy = self.spawn_x, 0
+            self.rotation = 0
+            self.hold_used = False
+        else:
+            self.game_over = True
+
+        return erase_count
+
+    def _clear_lines(self, rows, saved=None):
+        """只检查刚锁定方块所在的行，消除满行并计算得分与升级，返回消除的行数。"""
+        self.cleared_rows = self.board.clear_lines(rows, saved)
+        erase_count = len(self.cleared_rows)
+
+        self.score += line_scores[erase_count] * self.level
+        self.lines += erase_count
+
+        # 升级逻辑
+        self.goal -= erase_count  # 减少剩余目标行数
+        if self.goal < 1 and self.level < 15:  # 达成目标且等级未满
+            self.level += 1
+            self.goal += self.level * 5  # 下落速度随等级由 gravity_table 决定
+
+        return erase_count